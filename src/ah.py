@@ -1,5 +1,10 @@
 import networkx as nx
 from utils import *
+from compact import CompactGraph
+from mst import graph_mst
+from rooted_tree import ReplacementIndex
+from tree_state import TreeState
+from profiling import count, phase, timed
 
 
 def select_excess_edges(T: nx.Graph, v: int, limite: int):
@@ -29,7 +34,7 @@ def select_excess_edges(T: nx.Graph, v: int, limite: int):
     return aristas_incidentes[:exceso]
 
 
-def find_replacement_edge(T: nx.Graph, e: tuple, G: nx.Graph, degree_bounds: dict, violador: int = None):
+def find_replacement_edge(T: nx.Graph, e: tuple, G: nx.Graph, degree_bounds: dict, violador: int = None, cg: CompactGraph = None, index: ReplacementIndex = None, state: TreeState = None):
     '''
     Busca una arista (x,y) en G \ T que:
     1. Conecte componentes separadas si quitamos e
@@ -40,84 +45,128 @@ def find_replacement_edge(T: nx.Graph, e: tuple, G: nx.Graph, degree_bounds: dic
     
     :param e: Tupla (u, v, peso) representando la arista a reemplazar
     :param violador: Nodo violador (opcional). Si se especifica, el reemplazo debe reducir su grado.
+    :param cg: Representación compacta de G (opcional). Conviene construirla una sola vez y reutilizarla.
+    :param index: Índice de reemplazos de T (opcional). Si se pasa debe estar sincronizado con T.
+    :param state: Estado de T (opcional). Si se pasa, los grados se leen de él.
     '''
     u, v = e[0], e[1]
     
-    # Removemos temporalmente la arista e del árbol
-    T_temp = T.copy()
-    if T_temp.has_edge(u, v):
-        T_temp.remove_edge(u, v)
-    else:
+    if not T.has_edge(u, v):
         return None
+    if index is None:
+        # Solo hay dos componentes al quitar e si T es un árbol abarcador
+        if T.number_of_edges() != len(T) - 1 or not nx.is_connected(T):
+            return None
+        if cg is None:
+            cg = CompactGraph.from_nx(G)
+        index = ReplacementIndex(cg, cg.tree_edges(T))
     
-    # Obtenemos las componentes conexas después de remover e
-    components = list(nx.connected_components(T_temp))
-    if len(components) != 2:
-        return None
+    cg = index.cg
+    _, _, _, eu, ev, ew = cg.lists()
+    nodes = cg.nodes
+    iu, iv = cg.index[u], cg.index[v]
+    iviol = cg.index[violador] if violador in (u, v) else -1
+    if state is not None:
+        grado, limite = state.deg.__getitem__, state.bound.__getitem__
+    else:
+        grado = lambda z: T.degree(nodes[z])
+        limite = lambda z: degree_bounds[nodes[z]]
     
-    # Encontramos a qué componente pertenece cada nodo
-    comp_u = next(c for c in components if u in c)
-    comp_v = next(c for c in components if v in c)
-    
-    # Buscamos aristas en G que conecten las dos componentes
-    best_candidate = None
-    best_cost = float('inf')
-    
-    # Buscamos aristas que conecten nodos de comp_u con nodos de comp_v
-    for node_u in comp_u:
-        for node_v in comp_v:
-            # Verificamos si existe una arista en G entre estos nodos
-            # y que no esté ya en T_temp
-            if G.has_edge(node_u, node_v) and not T_temp.has_edge(node_u, node_v):
-                w_candidate = G[node_u][node_v]['weight']
-                
-                # Verificamos que al agregar esta arista, no se excedan los límites de grado
-                # Para node_u: su grado actual en T_temp + 1 debe ser <= degree_bounds[node_u]
-                # Para node_v: su grado actual en T_temp + 1 debe ser <= degree_bounds[node_v]
-                grado_u_temp = T_temp.degree(node_u)
-                grado_v_temp = T_temp.degree(node_v)
-                
-                if (grado_u_temp + 1 <= degree_bounds[node_u] and 
-                    grado_v_temp + 1 <= degree_bounds[node_v]):
-                    
-                    # Si se especificó un violador, verificamos que el reemplazo reduzca su grado
-                    if violador is not None:
-                        # El violador debe ser u o v (uno de los extremos de la arista removida)
-                        # Para que el grado del violador se reduzca, la nueva arista NO debe tener
-                        # al violador como extremo (porque entonces su grado no cambiaría)
-                        if violador == u:
-                            # Si removemos (u, v) y u es el violador, la nueva arista (node_u, node_v)
-                            # no debe tener a u como extremo. Como u está en comp_u, verificamos node_u
-                            if node_u == violador or node_v == violador:
-                                continue
-                        elif violador == v:
-                            # Si removemos (u, v) y v es el violador, la nueva arista (node_u, node_v)
-                            # no debe tener a v como extremo. Como v está en comp_v, verificamos node_v
-                            if node_u == violador or node_v == violador:
-                                continue
-                    
-                    # Preferimos la arista de menor costo
-                    if w_candidate < best_cost:
-                        best_cost = w_candidate
-                        best_candidate = (node_u, node_v, w_candidate)
+    examinadas = [0]
     
-    return best_candidate
+    def acepta(k):
+        examinadas[0] += 1
+        x, y = eu[k], ev[k]
+        # Si se especificó un violador, la nueva arista no debe tenerlo como extremo
+        # (si lo tuviera, su grado no cambiaría)
+        if x == iviol or y == iviol:
+            return False
+        # Al agregar esta arista no se deben exceder los límites de grado (sin contar e)
+        for z in (x, y):
+            if grado(z) - (z == iu or z == iv) + 1 > limite(z):
+                return False
+        return True
+    
+    # Las aristas aceptadas más baratas entre las que cruzan el corte de e
+    empatadas = index.cheapest(iu, iv, acepta)
+    # La propia arista e tampoco está en T sin e, así que también es candidata
+    # (con un violador como extremo nunca se acepta)
+    eid = cg.edge_id(iu, iv)
+    if acepta(eid):
+        if not empatadas or ew[eid] < ew[empatadas[0]]:
+            empatadas = [eid]
+        elif ew[eid] == ew[empatadas[0]]:
+            empatadas.append(eid)
+    count('ah.replacement_searches')
+    count('ah.candidates_examined', examinadas[0])
+    if not empatadas:
+        return None
+    
+    # Entre aristas de igual costo se elige la de menor id en cg (el orden de G.edges), que no depende de
+    # cómo se recorren las componentes
+    if len(empatadas) > 1:
+        count('ah.ties')
+    k = min(empatadas)
+    # (node_u, node_v, peso), con node_u del lado de u
+    x, y = eu[k], ev[k]
+    c = index.tree.child(iu, iv)
+    if index.tree.in_subtree(c, x) != (c == iu):
+        x, y = y, x
+    return nodes[x], nodes[y], ew[k]
+
+
+def _intercambiar(T: nx.Graph, index: ReplacementIndex, state: TreeState, quitar: tuple, agregar: tuple):
+    '''
+    Quita la arista quitar=(u, v, ...) de T y agrega agregar=(x, y, peso), manteniendo al día el índice y el estado.
+    '''
+    u, v = quitar[0], quitar[1]
+    x, y, w = agregar
+    T.remove_edge(u, v)
+    T.add_weighted_edges_from([(x, y, w)])
+    cg = index.cg
+    iu, iv = cg.index[u], cg.index[v]
+    k = cg.edge_id(cg.index[x], cg.index[y])
+    state.swap(cg.edge_id(iu, iv), k)
+    index.swap(iu, iv, k)
+    count('ah.swaps')
 
 
-def AH_Heuristic(G: nx.Graph, degree_bounds: dict, C_max: float = None):
+@timed('ah')
+def AH_Heuristic(G: nx.Graph, degree_bounds: dict, C_max: float = None, cg: CompactGraph = None, mst_edges: list = None):
     '''
     Implementa la heurística AH para árbol abarcador de costo mínimo con restricción de grados.
     
     :param G: Grafo con nodos V y aristas E con pesos
     :param degree_bounds: Diccionario que mapea cada vértice v a su límite máximo de grado d(v)
     :param C_max: Cota superior de costo (opcional). Si se proporciona, se revierten cambios que excedan esta cota.
+    :param cg: Representación compacta de G (opcional), para reutilizarla entre llamadas sobre el mismo grafo.
+    :param mst_edges: Aristas del MST de G según nx.minimum_spanning_edges(G, data=True) (opcional), por el mismo motivo.
     :return: Tupla (costo, árbol generador mínimo factible T)
     '''
     # 1. Construir árbol generador mínimo inicial (sin restricción de grado)
-    T = nx.minimum_spanning_tree(G)
+    with phase('ah.mst'):
+        if mst_edges is None:
+            # MST compartido (ver mst.py); su representación compacta se reutiliza si no se pasó cg
+            mst = graph_mst(G, cg)
+            T = mst.tree(G)
+            if cg is None: cg = mst.cg
+        else:
+            T = tree_from_edges(G, mst_edges)
+    # Si G no es conexo no hay árbol abarcador que ajustar
+    if not nx.is_connected(T):
+        return get_cost(T), T
+    if cg is None:
+        cg = CompactGraph.from_nx(G)
+    nodes = cg.nodes
+    # Índice de reemplazos y estado (grados, costo, violadores) del árbol actual; se actualizan en cada intercambio
+    tree_edges = cg.tree_edges(T)
+    with phase('ah.index'):
+        index = ReplacementIndex(cg, tree_edges)
+    state = TreeState(cg, cg.bounds(degree_bounds), tree_edges)
     
     # 2. Detectar nodos que violan la restricción de grado
-    violadores = {v for v in T.nodes() if T.degree(v) > degree_bounds[v]}
+    # (el conjunto de etiquetas se arma en el orden de los vértices de G, como antes, para conservar el orden de recorrido)
+    violadores = {nodes[i] for i in sorted(state.violators)}
     
     # 3. Ajustar el árbol para cumplir restricciones de grado
     max_iterations = len(G.nodes()) * len(G.edges())  # Límite para evitar loops infinitos
@@ -142,7 +191,7 @@ def AH_Heuristic(G: nx.Graph, degree_bounds: dict, C_max: float = None):
                 
                 # Buscar arista alternativa para reemplazar
                 # Pasamos v como violador para asegurar que el reemplazo reduzca su grado
-                candidate = find_replacement_edge(T, e, G, degree_bounds, violador=v)
+                candidate = find_replacement_edge(T, e, G, degree_bounds, violador=v, index=index, state=state)
                 
                 if candidate is not None:
                     x, y, w_candidate = candidate
@@ -151,8 +200,7 @@ def AH_Heuristic(G: nx.Graph, degree_bounds: dict, C_max: float = None):
                     grado_antes = T.degree(v)
                     
                     # Reemplazar arista en el árbol
-                    T.remove_edge(u, v_node)
-                    T.add_weighted_edges_from([(x, y, w_candidate)])
+                    _intercambiar(T, index, state, (u, v_node), (x, y, w_candidate))
                     
                     # Verificar que el grado del violador se redujo
                     grado_despues = T.degree(v)
@@ -163,15 +211,15 @@ def AH_Heuristic(G: nx.Graph, degree_bounds: dict, C_max: float = None):
                         reemplazo_exitoso = True
                         
                         # Revisar costo total
-                        costo_despues = get_cost(T)
+                        costo_despues = state.cost
                         
                         # Si C_max está definido, NO debemos excederlo nunca
                         # El objetivo es encontrar un árbol factible con costo menor que C_max
                         # Si un cambio excede C_max, lo revertimos inmediatamente
                         if C_max is not None and costo_despues > C_max:
                             # Revertir cambio si excede la cota superior
-                            T.remove_edge(x, y)
-                            T.add_weighted_edges_from([(u, v_node, w_e)])
+                            _intercambiar(T, index, state, (x, y), (u, v_node, w_e))
+                            count('ah.reverts')
                             cambios_en_iteracion = False
                             reemplazo_exitoso = False
                         else:
@@ -182,13 +230,13 @@ def AH_Heuristic(G: nx.Graph, degree_bounds: dict, C_max: float = None):
                                 break
                     else:
                         # El reemplazo no redujo el grado del violador, revertir
-                        T.remove_edge(x, y)
-                        T.add_weighted_edges_from([(u, v_node, w_e)])
+                        _intercambiar(T, index, state, (x, y), (u, v_node, w_e))
+                        count('ah.reverts')
             
             # Si no se hizo ningún reemplazo exitoso para este violador, continuar con el siguiente
         
         # Actualizar lista de violadores
-        violadores = {v for v in T.nodes() if T.degree(v) > degree_bounds[v]}
+        violadores = {nodes[i] for i in sorted(state.violators)}
         
         # Si no hay cambios en los violadores Y no hubo cambios en esta iteración
         # Intentar una iteración más con una estrategia diferente: permitir reemplazos
@@ -203,12 +251,11 @@ def AH_Heuristic(G: nx.Graph, degree_bounds: dict, C_max: float = None):
                     u, v_node, w_e = edge_tuple
                     e = (u, v_node, w_e)
                     # Intentar sin pasar el violador para ser menos restrictivo
-                    candidate = find_replacement_edge(T, e, G, degree_bounds, violador=None)
+                    candidate = find_replacement_edge(T, e, G, degree_bounds, violador=None, index=index, state=state)
                     if candidate is not None:
                         x, y, w_candidate = candidate
                         grado_antes = T.degree(v)
-                        T.remove_edge(u, v_node)
-                        T.add_weighted_edges_from([(x, y, w_candidate)])
+                        _intercambiar(T, index, state, (u, v_node), (x, y, w_candidate))
                         grado_despues = T.degree(v)
                         # Aceptar si reduce el grado o si no lo aumenta mucho
                         if grado_despues <= grado_antes:
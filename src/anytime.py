@@ -0,0 +1,140 @@
+'''
+Resolución incremental ("anytime") de una instancia.
+
+solve_anytime es un generador que corre los algoritmos del más rápido al más caro y entrega cada
+vez que encuentra un árbol mejor o una cota inferior mejor:
+
+    Kernel+Kruskal -> método dual -> cota lagrangiana -> CH -> AH -> búsqueda local -> exacto (si es chica)
+
+Quien lo usa puede dejar de iterar cuando quiera (por ejemplo con la primera solución, o cuando la
+brecha sea suficientemente chica). Además se respeta un tiempo límite: cada etapa se interrumpe
+con SIGALRM al vencer el plazo (en el hilo principal de sistemas que lo soportan; si no, el plazo
+se revisa entre etapas).
+
+Uso:
+    for step in solve_anytime(G, degree_bounds, time_limit=0.5):
+        print(step["algo"], step["cost"], step["lower_bound"])
+'''
+
+import math
+import time
+
+import networkx as nx
+
+from utils import get_cost, is_feasable
+from kernelization import reduction_dcmst, kruskal_dcst
+from heuristics import dual_method
+from mst import minimum_spanning_tree
+from ch import CH_Heuristic
+from ah import AH_Heuristic
+from local_search import local_search
+from bruteforce import branch_and_bound
+from lagrangian import lagrangian_bound
+from timeouts import TimeLimitExceeded, time_limit
+
+
+def _until(deadline, f, *args, **kwargs):
+    '''
+    Ejecuta f(*args, **kwargs) interrumpiéndola al llegar a deadline (time.time()).
+
+    :return: el resultado de f, o None si no alcanzó el tiempo
+    '''
+    if deadline is None:
+        return f(*args, **kwargs)
+    remaining = deadline - time.time()
+    if remaining <= 0:
+        return None
+    try:
+        with time_limit(remaining):
+            return f(*args, **kwargs)
+    except TimeLimitExceeded:
+        return None
+
+
+def _kernel(G, degree_bounds):
+    G_red, T_star = reduction_dcmst(G, degree_bounds)
+    return kruskal_dcst(G_red, T_star, degree_bounds)
+
+
+def solve_anytime(G: nx.Graph, degree_bounds: dict, time_limit: float = None, deadline: float = None,
+                  exact_edge_limit: int = 30, tabu: int = 10):
+    '''
+    Generador de soluciones cada vez mejores.
+
+    :param time_limit: segundos disponibles desde la llamada (opcional)
+    :param deadline: instante límite según time.time() (opcional). Si se indican ambos se usa el más cercano.
+    :param exact_edge_limit: se corre ramificación y acotación si G tiene a lo sumo esta cantidad de aristas
+    :param tabu: tenencia tabu de la búsqueda local final (0 para solo descenso)
+    :return: entrega diccionarios con
+             - algo: etapa que produjo la mejora
+             - cost, tree: mejor costo y mejor árbol factible hasta el momento (inf y None si todavía no hay)
+             - lower_bound: mejor cota inferior conocida
+             - optimal: True si el costo coincide con la cota inferior (es la última entrega)
+             - time: segundos desde el inicio
+    '''
+    start = time.time()
+    if time_limit is not None:
+        deadline = start + time_limit if deadline is None else min(deadline, start + time_limit)
+    best_cost, best_tree, lower_bound = math.inf, None, -math.inf
+
+    def step(algo):
+        return {"algo": algo, "cost": best_cost, "tree": best_tree, "lower_bound": lower_bound,
+                "optimal": best_tree is not None and best_cost <= lower_bound, "time": time.time() - start}
+
+    def better(T):
+        # el árbol es factible y mejora al actual
+        return (T is not None and len(T) == len(G) and nx.is_tree(T) and is_feasable(degree_bounds, T)
+                and get_cost(T) < best_cost)
+
+    # el MST sin restricciones es una cota inferior y, si es factible, la solución óptima
+    mst = _until(deadline, minimum_spanning_tree, G)
+    if mst is None or len(G) == 0 or not nx.is_connected(mst):
+        return
+    lower_bound = get_cost(mst)
+    if better(mst):
+        best_cost, best_tree = lower_bound, mst
+        yield step("MST")
+        return
+
+    heuristics = [
+        ("Kernel+Kruskal", lambda: _kernel(G, degree_bounds)),
+        ("Dual method", lambda: dual_method(G, minimum_spanning_tree(G), degree_bounds)),
+        ("Lagrangian bound", None),
+        ("CH", lambda: CH_Heuristic(G, degree_bounds, ub=best_cost if best_tree else None)[1]),
+        ("AH", lambda: AH_Heuristic(G, degree_bounds, C_max=best_cost if best_tree else None)[1]),
+        ("Local search", lambda: local_search(G, best_tree, degree_bounds)[1] if best_tree else None),
+        ("Tabu search", lambda: local_search(G, best_tree, degree_bounds, tabu=tabu)[1] if best_tree and tabu else None),
+    ]
+    for algo, run in heuristics:
+        if deadline is not None and time.time() >= deadline:
+            return
+        if run is None:
+            result = _until(deadline, lagrangian_bound, G, degree_bounds, ub=best_cost if best_tree else None)
+            if result is None:
+                continue
+            if result["lower_bound"] == math.inf:
+                # la relajación no tiene solución: la instancia es infactible
+                lower_bound = math.inf
+                yield step(algo)
+                return
+            if result["lower_bound"] > lower_bound:
+                lower_bound = result["lower_bound"]
+                yield step(algo)
+        else:
+            T = _until(deadline, run)
+            if better(T):
+                best_cost, best_tree = get_cost(T), T
+                yield step(algo)
+        if best_cost <= lower_bound:
+            return
+
+    if G.number_of_edges() <= exact_edge_limit:
+        result = _until(deadline, branch_and_bound, G, degree_bounds, best_cost)
+        if result is None:
+            return
+        cost, T = result
+        if better(T):
+            best_cost, best_tree = cost, T
+        # sin árbol mejor que el actual, el actual es óptimo
+        lower_bound = best_cost
+        yield step("Branch and bound")
@@ -0,0 +1,259 @@
+'''
+Benchmarks repetibles de los algoritmos con semillas fijas.
+
+Cada corrida es un trío (tier, algoritmo, instancia) y se ejecuta en un proceso nuevo, para que el pico
+de memoria residente (RSS) sea el de esa corrida. Se registra:
+- time: mejor tiempo (perf_counter) de --repeat ejecuciones
+- peak_mem: pico de memoria reservada por Python durante una ejecución extra con tracemalloc
+  (tracemalloc hace más lento el código, por eso no se mide en las mismas ejecuciones que el tiempo)
+- rss: pico de memoria residente del proceso, en KiB
+- cost, feasible: costo del árbol y si es factible
+
+Los tiers son:
+- heuristics: Kernel+Kruskal, método dual, CH y AH sobre grafos ralos (grado medio ~8) hasta n = 10^4
+- bruteforce y branch_and_bound: instancias chicas para los algoritmos exactos
+Todas las instancias son conexas y factibles (ver build_instance), así que un caso que agota --time-limit
+(por defecto 600 s para las --repeat ejecuciones más la de tracemalloc) o devuelve un árbol infactible se
+reporta como regresión.
+
+Uso:
+    python benchmark.py --out baseline.json
+    python benchmark.py --compare baseline.json --tolerance 0.25    # sale con código 1 si hay regresiones
+    python benchmark.py --tiers exact --sizes 6 7 --out chico.json
+'''
+
+import argparse
+import gc
+import json
+import math
+import platform
+import resource
+import sys
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+
+import networkx as nx
+import numpy as np
+
+from utils import get_cost, is_feasable
+from instance_generator import generate_instance, generate_instance_np
+from instance_io import to_nx
+from bruteforce import branch_and_bound
+from mst import clear_cache
+from runner import ALGORITHMS
+from timeouts import TimeLimitExceeded, time_limit
+
+
+def run_branch_and_bound(G, degree_bounds):
+    _, T = branch_and_bound(G, degree_bounds)
+    return T, None
+
+BENCH_ALGORITHMS = dict(ALGORITHMS, **{"Branch and bound": run_branch_and_bound})
+
+# algoritmos, tamaños, semillas por tamaño y generador de cada tier
+TIERS = {
+    "heuristics": {"algos": ["Kernel+Kruskal", "Dual method", "CH", "AH"],
+                   "sizes": [100, 300, 1000, 3000, 10000], "seeds": 2, "sparse": True},
+    "bruteforce": {"algos": ["Bruteforce"], "sizes": [5, 6, 7, 8], "seeds": 3, "sparse": False},
+    "branch_and_bound": {"algos": ["Branch and bound"], "sizes": [8, 10, 12, 14], "seeds": 3, "sparse": False},
+}
+# alias para correr juntos los dos tiers exactos
+TIER_GROUPS = {"exact": ["bruteforce", "branch_and_bound"], "all": list(TIERS)}
+SEED_BASE = 90_000
+# (restricción mínima, margen máximo sobre el grado en el árbol base) para instancias ralas y densas
+# (ver build_instance). Con restricciones más ajustadas las heurísticas no encuentran árboles factibles
+# en n = 10^4; en las densas chicas una mínima de 3 deja al MST sin violaciones.
+SPARSE_BOUNDS = (3, 2)
+DENSE_BOUNDS = (1, 1)
+
+
+def build_instance(n, seed, sparse):
+    '''
+    Instancia del benchmark. Las ralas tienen grado medio cercano a 8 para que n = 10^4 siga siendo manejable.
+    Todas son conexas y factibles: las primeras n-1 aristas del generador forman un árbol abarcador y la
+    restricción de cada vértice es max(grado en ese árbol, mínima) más un margen al azar (SPARSE_BOUNDS y
+    DENSE_BOUNDS).
+    Los pesos se sortean de nuevo entre 1 y 10 para todas las aristas; así el MST no es el árbol base y
+    viola algunas restricciones.
+    '''
+    if sparse:
+        eu, ev, _, _ = generate_instance_np(n, edge_prob=min(0.4, 8 / max(n - 1, 1)), seed=seed)
+    else:
+        edges, _ = generate_instance(n, seed=seed)
+        eu = np.array([u for u, _, _ in edges], dtype=np.int64)
+        ev = np.array([v for _, v, _ in edges], dtype=np.int64)
+    min_bound, slack = SPARSE_BOUNDS if sparse else DENSE_BOUNDS
+    rng = np.random.default_rng([seed, 1])
+    w = rng.integers(1, 11, len(eu))
+    deg = np.bincount(eu[:n - 1], minlength=n) + np.bincount(ev[:n - 1], minlength=n)
+    degree_bounds = np.maximum(deg, min_bound) + rng.integers(0, slack + 1, n)
+    return to_nx(eu, ev, w, degree_bounds)
+
+
+def run_case(case):
+    '''
+    Mide un algoritmo sobre una instancia. Se ejecuta en un proceso propio (ver run_suite).
+    '''
+    G, degree_bounds = build_instance(case["n"], case["seed"], case["sparse"])
+    solve = BENCH_ALGORITHMS[case["algo"]]
+    limit = case["time_limit"]
+    result = {"m": G.number_of_edges()}
+    try:
+        with time_limit(limit):
+            times = []
+            # sin el MST en caché (ver mst.py), para medir también su construcción
+            for _ in range(case["repeat"]):
+                clear_cache(G)
+                gc.collect()
+                start = time.perf_counter()
+                T, _ = solve(G, degree_bounds)
+                times.append(time.perf_counter() - start)
+            clear_cache(G)
+            gc.collect()
+            tracemalloc.start()
+            try:
+                solve(G, degree_bounds)
+                _, peak = tracemalloc.get_traced_memory()
+            finally:
+                tracemalloc.stop()
+    except TimeLimitExceeded:
+        result.update({"time": limit, "peak_mem": None, "cost": math.inf, "feasible": False, "timed_out": True})
+    else:
+        feasible = len(T) == len(G) and nx.is_tree(T) and is_feasable(degree_bounds, T)
+        result.update({"time": min(times), "peak_mem": peak, "cost": float(get_cost(T)) if feasible else math.inf,
+                       "feasible": feasible, "timed_out": False})
+    result["rss"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return result
+
+
+def case_key(case):
+    return f"{case['tier']}/{case['algo']}/n={case['n']}/seed={case['seed']}"
+
+
+def make_cases(tiers, sizes=None, seeds=None, repeat=3, time_limit=600):
+    '''
+    :param tiers: nombres de TIERS o de TIER_GROUPS
+    :param sizes: reemplaza los tamaños de cada tier (opcional)
+    :param seeds: reemplaza la cantidad de semillas por tamaño (opcional)
+    '''
+    names = []
+    for t in tiers:
+        names.extend(TIER_GROUPS.get(t, [t]))
+    cases = []
+    for tier in dict.fromkeys(names):
+        spec = TIERS[tier]
+        for n in sizes or spec["sizes"]:
+            for i in range(seeds or spec["seeds"]):
+                for algo in spec["algos"]:
+                    cases.append({"tier": tier, "algo": algo, "n": n, "seed": SEED_BASE + n * 100 + i,
+                                  "sparse": spec["sparse"], "repeat": repeat, "time_limit": time_limit})
+    return cases
+
+
+def run_suite(cases, verbose=True):
+    '''
+    Corre los casos de a uno, cada uno en un proceso nuevo.
+
+    :return: diccionario clave del caso -> resultado
+    '''
+    results = {}
+    with ProcessPoolExecutor(max_workers=1, max_tasks_per_child=1) as pool:
+        for case in cases:
+            key = case_key(case)
+            results[key] = pool.submit(run_case, case).result()
+            if verbose:
+                r = results[key]
+                print(f"{key}: {r['time']:.4f}s | peak={_kib(r['peak_mem'])} | rss={r['rss']} KiB | "
+                      f"costo={r['cost']}{' (tiempo agotado)' if r['timed_out'] else ''}", flush=True)
+    return results
+
+
+def _kib(b):
+    return "-" if b is None else f"{b / 1024:.0f} KiB"
+
+
+def compare(baseline, results, tolerance=0.25, mem_tolerance=None, min_time=0.01):
+    '''
+    Compara los resultados contra la línea base.
+
+    :param tolerance: aumento relativo de tiempo permitido (0.25 = 25%)
+    :param mem_tolerance: aumento relativo de memoria permitido (por defecto, tolerance)
+    :param min_time: diferencias de tiempo por debajo de estos segundos se consideran ruido
+    :return: (regresiones, notas) como listas de mensajes. Las notas son cambios de costo o casos nuevos.
+    Un caso que agotó el tiempo o no es factible, en la línea base o en la corrida actual, es una regresión.
+    '''
+    mem_tolerance = tolerance if mem_tolerance is None else mem_tolerance
+    regressions, notes = [], []
+    for key, r in results.items():
+        base = baseline.get(key)
+        if base is None:
+            notes.append(f"{key}: sin línea base")
+            continue
+        # sin una corrida completa y factible en ambos lados no hay contra qué comparar
+        if base["timed_out"] or not base["feasible"]:
+            regressions.append(f"{key}: la línea base {'agotó el tiempo' if base['timed_out'] else 'no es factible'}")
+            continue
+        if r["timed_out"]:
+            regressions.append(f"{key}: agotó el tiempo (antes {base['time']:.4f}s)")
+            continue
+        if not r["feasible"]:
+            regressions.append(f"{key}: el árbol no es factible (antes costo {base['cost']})")
+            continue
+        if r["time"] > base["time"] * (1 + tolerance) and r["time"] - base["time"] > min_time:
+            regressions.append(f"{key}: tiempo {r['time']:.4f}s vs {base['time']:.4f}s "
+                               f"(+{(r['time'] / base['time'] - 1) * 100:.0f}%)")
+        for field in ("peak_mem", "rss"):
+            if r[field] is not None and base[field] and r[field] > base[field] * (1 + mem_tolerance):
+                regressions.append(f"{key}: {field} {r[field]} vs {base[field]} "
+                                   f"(+{(r[field] / base[field] - 1) * 100:.0f}%)")
+        if r["cost"] != base["cost"]:
+            notes.append(f"{key}: costo {r['cost']} vs {base['cost']}")
+    return regressions, notes
+
+
+def save(path, results, args=None):
+    meta = {"python": sys.version.split()[0], "platform": platform.platform(), "networkx": nx.__version__}
+    if args is not None:
+        meta["args"] = vars(args)
+    with open(path, "w") as f:
+        json.dump({"meta": meta, "results": results}, f, indent=2)
+
+
+def load(path):
+    with open(path) as f:
+        return json.load(f)["results"]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de los algoritmos DC-MST con semillas fijas.")
+    parser.add_argument("--tiers", nargs="+", default=["all"], choices=list(TIERS) + list(TIER_GROUPS))
+    parser.add_argument("--sizes", type=int, nargs="+", default=None, help="reemplaza los tamaños de los tiers")
+    parser.add_argument("--seeds", type=int, default=None, help="reemplaza las semillas por tamaño")
+    parser.add_argument("--repeat", type=int, default=3, help="ejecuciones por caso; se guarda el mejor tiempo")
+    parser.add_argument("--time-limit", type=float, default=600, help="segundos por caso")
+    parser.add_argument("--out", default=None, help="archivo JSON donde guardar los resultados (línea base)")
+    parser.add_argument("--compare", default=None, help="línea base JSON contra la que comparar")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="aumento de tiempo permitido (0.25 = 25%%)")
+    parser.add_argument("--mem-tolerance", type=float, default=None, help="aumento de memoria permitido")
+    parser.add_argument("--min-time", type=float, default=0.01, help="diferencias de tiempo menores se ignoran")
+    args = parser.parse_args(argv)
+
+    cases = make_cases(args.tiers, args.sizes, args.seeds, args.repeat, args.time_limit)
+    results = run_suite(cases)
+    if args.out:
+        save(args.out, results, args)
+        print(f"{len(results)} casos -> {args.out}")
+    if args.compare:
+        regressions, notes = compare(load(args.compare), results, args.tolerance, args.mem_tolerance, args.min_time)
+        for msg in notes:
+            print("nota:", msg)
+        for msg in regressions:
+            print("REGRESIÓN:", msg)
+        if regressions:
+            sys.exit(1)
+        print("sin regresiones")
+
+
+if __name__ == "__main__":
+    main()
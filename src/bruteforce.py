@@ -1,7 +1,16 @@
+import multiprocessing as mp
+import os
+from concurrent.futures import ProcessPoolExecutor
 import networkx as nx
 from itertools import combinations
 from utils import *
+from compact import CompactGraph
+from profiling import count, timed
 
+# mayor cantidad de vértices con la que se usa subset_dp automáticamente (el trabajo crece con 3^n)
+SUBSET_DP_MAX_N = 12
+
+@timed('bruteforce')
 def bruteforce(G:nx.Graph,degree_bound) -> tuple[int,nx.Graph]: # O(2^m), m = |E|
     '''
     :param G: instancia a resolver
@@ -14,20 +23,28 @@ def bruteforce(G:nx.Graph,degree_bound) -> tuple[int,nx.Graph]: # O(2^m), m = |E
     m = len(G.edges)
     min_cost = float('inf') # fijamos una cota superior para podas
     best_edges = None  # Guardamos solo las aristas de la mejor solución, no el árbol completo
+    subsets = checked = 0
 
     # probamos todas las combinaciones posibles a escoger del conjunto de aristas
     for k in range(1,m+1):
         for comb in combinations(G.edges.data(),k):
+            subsets += 1
             # creamos un grafo por cada combinación
             T = nx.Graph()
             T.add_nodes_from(G)
             T.add_edges_from([(u,v,w) for u,v,w in comb])
             actual_cost = get_cost(T)                   # obtenemos el costo de aristas del grafo craedo con esta combinación
             if len(T.edges) < n - 1: continue           # las combinaciones de aristas con menos de n-1 las descartamos
+            checked += 1
             if nx.is_tree(T) and is_feasable(degree_bound,T):    # si el costo es potencialmente mejor que el mejor costo obtenido, verificamos que sea un árbol y que se cumpla la restricción de grado 
-                min_cost = get_cost(T)
-    return min_cost,T
+                if actual_cost >= min_cost: continue    # se guarda la mejor solución, no la última encontrada
+                min_cost = actual_cost
+                best_edges = comb
+    count('bruteforce.subsets',subsets)
+    count('bruteforce.trees_checked',checked)
+    return min_cost,_build_tree(G,best_edges)
 
+@timed('bruteforce')
 def optimized_bruteforce(G:nx.Graph,degree_bound) -> tuple[int,nx.Graph]: # O(2^m), m = |E|
     '''
     :param G: instancia a resolver
@@ -40,10 +57,12 @@ def optimized_bruteforce(G:nx.Graph,degree_bound) -> tuple[int,nx.Graph]: # O(2^
     m = len(G.edges)
     min_cost = float('inf') # fijamos una cota superior para podas
     best_edges = None  # Guardamos solo las aristas de la mejor solución, no el árbol completo
+    subsets = checked = 0
 
     # probamos todas las combinaciones posibles a escoger del conjunto de aristas
     for k in range(1,m+1):
         for comb in combinations(G.edges.data(),k):
+            subsets += 1
             # creamos un grafo por cada combinación
             T = nx.Graph()
             T.add_nodes_from(G)
@@ -51,7 +70,347 @@ def optimized_bruteforce(G:nx.Graph,degree_bound) -> tuple[int,nx.Graph]: # O(2^
             actual_cost = get_cost(T)                   # obtenemos el costo de aristas del grafo craedo con esta combinación
             if len(T.edges) < n - 1: continue           # las combinaciones de aristas con menos de n-1 las descartamos
             if actual_cost >= min_cost: continue        # podamos aquellas soluciones que excedan nuestra mejor solución
+            checked += 1
             if nx.is_tree(T) and is_feasable(degree_bound,T):    # si el costo es potencialmente mejor que el mejor costo obtenido, verificamos que sea un árbol y que se cumpla la restricción de grado 
-                min_cost = get_cost(T)
-    return min_cost,T
+                min_cost = actual_cost
+                best_edges = comb
+    count('bruteforce.subsets',subsets)
+    count('bruteforce.trees_checked',checked)
+    return min_cost,_build_tree(G,best_edges)
+
+@timed('subset_dp')
+def subset_dp(G:nx.Graph,degree_bound) -> tuple[int,nx.Graph]: # O(n 3^n)
+    '''
+    :param G: instancia a resolver
+    :param degree_bound: mapeo de las restricciones de grado para cada vértice.
+
+    Programación dinámica sobre subconjuntos de vértices (representados como bits de un int). El árbol se
+    enraíza en el vértice 0 y c[v][S][k] es el costo mínimo de un árbol sobre el conjunto S con raíz v en el
+    que v tiene a lo sumo k hijos. Para calcularlo se elige el subárbol T de v que contiene al menor vértice
+    de S - {v} (así cada partición se cuenta una vez):
+
+        c[v][S][k] = min_T c[v][S - T][k - 1] + h[T][v]
+        h[T][v] = min_{u en T vecino de v} w(u,v) + c[u][T][b(u) - 1]
+
+    donde un vértice que no es la raíz puede tener b(u) - 1 hijos. El trabajo crece con 3^n y no depende de
+    la cantidad de aristas, así que conviene frente a bruteforce en grafos densos (ver prefer_subset_dp).
+
+    Devuelve el costo óptimo y el árbol óptimo (inf y un grafo sin aristas si no hay solución).
+    '''
+    cg = CompactGraph.from_nx(G)
+    n = cg.n
+    if n <= 1:
+        return 0,cg.to_nx([])
+    _,_,_,eu,ev,ew = cg.lists()
+    inf = float('inf')
+    w = [[inf] * n for _ in range(n)]
+    for e in range(cg.m):
+        w[eu[e]][ev[e]] = w[ev[e]][eu[e]] = ew[e]
+    # hijos permitidos: b(0) para la raíz, b(u) - 1 para el resto (a lo sumo n - 1)
+    kids = [min(b,n - 1) for b in cg.bounds(degree_bound)]
+    for u in range(1,n): kids[u] -= 1
+    if min(kids) < 0:
+        return inf,cg.to_nx([])
+
+    full = (1 << n) - 1
+    # c[v][S]: lista de costos por cantidad máxima de hijos; choice[v][S][k]: subárbol T elegido
+    c = [dict() for _ in range(n)]
+    choice = [dict() for _ in range(n)]
+    # h[T]: lista por v de (costo de colgar T de v, vértice de T que se une a v)
+    h = {}
+    for v in range(n):
+        c[v][1 << v] = [0] * (kids[v] + 1)
+        choice[v][1 << v] = [0] * (kids[v] + 1)
+    states = 0
+
+    # los subconjuntos de S son números menores que S: recorrerlos en orden creciente alcanza
+    for S in range(1,full + 1):
+        # los subárboles nunca contienen a la raíz 0, y la raíz solo aparece con raíz 0
+        roots = (0,) if S & 1 else tuple(v for v in range(n) if S >> v & 1)
+        if S & (S - 1):
+            for v in roots:
+                R = S ^ (1 << v)
+                low = R & -R
+                rest = R ^ low
+                K = kids[v]
+                best = [inf] * (K + 1)
+                arg = [0] * (K + 1)
+                sub = rest
+                while True:
+                    T = sub | low
+                    states += 1
+                    ht = h.get(T)
+                    if ht is not None and ht[v][0] < inf:
+                        cv = c[v].get(S ^ T)
+                        if cv is not None:
+                            add = ht[v][0]
+                            for k in range(1,K + 1):
+                                val = cv[k - 1] + add
+                                if val < best[k]:
+                                    best[k],arg[k] = val,T
+                    if sub == 0: break
+                    sub = (sub - 1) & rest
+                if best[K] < inf:
+                    for k in range(1,K + 1):
+                        if best[k - 1] < best[k]:
+                            best[k],arg[k] = best[k - 1],arg[k - 1]
+                    c[v][S],choice[v][S] = best,arg
+        if S & 1: continue
+        # S como subárbol: costo de colgarlo de cada vértice fuera de S
+        members = [u for u in range(n) if S >> u & 1 and S in c[u]]
+        if not members: continue
+        row = []
+        for v in range(n):
+            best_v,best_u = inf,-1
+            if not S >> v & 1:
+                wv = w[v]
+                for u in members:
+                    val = wv[u] + c[u][S][kids[u]]
+                    if val < best_v: best_v,best_u = val,u
+            row.append((best_v,best_u))
+        h[S] = row
+    count('subset_dp.transitions',states)
+
+    if full not in c[0]:
+        return inf,cg.to_nx([])
+    edges = []
+    stack = [(0,full,kids[0])]
+    while stack:
+        v,S,k = stack.pop()
+        if S == 1 << v: continue
+        T = choice[v][S][k]
+        u = h[T][v][1]
+        edges.append(cg.edge_id(u,v))
+        stack.append((u,T,kids[u]))
+        stack.append((v,S ^ T,k - 1))
+    return c[0][full][kids[0]],cg.to_nx(edges)
+
+def prefer_subset_dp(n:int,m:int) -> bool:
+    '''
+    True si conviene subset_dp en lugar de bruteforce: n es chico y 2^n es mucho menor que 2^m.
+    '''
+    return n <= SUBSET_DP_MAX_N and m - n >= 8
+
+def _build_tree(G:nx.Graph,edges):
+    T = nx.Graph()
+    T.add_nodes_from(G)
+    if edges is not None: T.add_edges_from(edges)
+    return T
+
+def _weight_order(cg:CompactGraph):
+    # ids de las aristas ordenados por peso; las posiciones en este orden identifican las aristas en la búsqueda
+    _,_,_,_,_,ew = cg.lists()
+    return sorted(range(cg.m),key=lambda e: ew[e])
+
+def _search(cg:CompactGraph,bound:list[int],order:list[int],best:list,prefix=(),split_depth:int=None,tasks:list=None,shared=None):
+    '''
+    Búsqueda de branch_and_bound desde el árbol parcial prefix.
+
+    :param bound: restricción de grado de cada vértice (índices de cg)
+    :param order: ids de las aristas ordenados por peso (ver _weight_order)
+    :param best: [mejor costo, posiciones del mejor árbol]; se actualiza al encontrar árboles mejores
+    :param prefix: posiciones en order de aristas ya elegidas, en orden creciente (acíclicas y dentro de los grados)
+    :param split_depth: si se indica, las ramas que llegan a esa cantidad de aristas no se exploran y su
+                        árbol parcial se agrega a tasks
+    :param shared: multiprocessing.Value con el mejor costo entre todos los procesos (opcional). Se lee en
+                   cada nodo para podar y se actualiza con cada árbol mejor.
+    :return: contadores de nodos y podas
+    '''
+    n = cg.n
+    _,_,_,eu,ev,ew = cg.lists()
+    U = [eu[e] for e in order]
+    V = [ev[e] for e in order]
+    W = [ew[e] for e in order]
+    m = len(W)
+
+    deg = [0] * n               # grado de cada vértice en el árbol parcial
+    parent = list(range(n))     # union-find por tamaño sin compresión de caminos, para poder deshacer uniones
+    size = [1] * n
+    chosen = []                 # aristas del árbol parcial (posiciones en el orden por peso)
+    stats = {'nodes': 0, 'pruned_bound': 0, 'pruned_incumbent': 0}
+
+    def find(x):
+        while parent[x] != x: x = parent[x]
+        return x
+
+    def lower_bound(start):
+        # Kruskal sobre las componentes actuales con las aristas restantes que aún pueden usarse.
+        # Un vértice con restricción 1 todavía aislado tiene que terminar como hoja: se excluye del
+        # MST y se le suma su arista utilizable más barata hacia el resto.
+        need = n - 1 - len(chosen)
+        comp = [find(x) for x in range(n)]
+        hoja = [n > 2 and bound[x] == 1 and deg[x] == 0 for x in range(n)]
+        hojas = sum(hoja)
+        if hojas == n: hoja,hojas = [False] * n,0
+        rep = list(range(n))
+        total = merged = 0
+        pendientes = set(x for x in range(n) if hoja[x])
+        for k in range(start,m):
+            if merged == need - hojas and not pendientes: break
+            u,v = U[k],V[k]
+            if deg[u] >= bound[u] or deg[v] >= bound[v]: continue
+            if hoja[u] or hoja[v]:
+                if hoja[u] and hoja[v]: continue
+                x = u if hoja[u] else v
+                if x in pendientes:
+                    pendientes.discard(x)
+                    total += W[k]
+                continue
+            a,b = set_of(comp[u],rep),set_of(comp[v],rep)
+            if a == b: continue
+            rep[b] = a
+            total += W[k]
+            merged += 1
+        return total if merged == need - hojas and not pendientes else None
+
+    def search(start,cost):
+        need = n - 1 - len(chosen)
+        stats['nodes'] += 1
+        if shared is not None and shared.value < best[0]:
+            best[0] = shared.value
+        if need == 0:
+            best[0],best[1] = cost,chosen.copy()
+            if shared is not None:
+                with shared.get_lock():
+                    if cost < shared.value: shared.value = cost
+            return
+        lb = lower_bound(start)
+        if lb is None or cost + lb >= best[0]:
+            stats['pruned_bound'] += 1
+            return
+        if len(chosen) == split_depth:
+            tasks.append(tuple(chosen))
+            return
+        for k in range(start,m - need + 1):
+            if cost + W[k] * need >= best[0]:   # las aristas que faltan pesan al menos W[k]
+                stats['pruned_incumbent'] += 1
+                break
+            u,v = U[k],V[k]
+            if deg[u] >= bound[u] or deg[v] >= bound[v]: continue
+            a,b = find(u),find(v)
+            if a == b: continue
+            if size[a] < size[b]: a,b = b,a
+            parent[b] = a
+            size[a] += size[b]
+            deg[u] += 1
+            deg[v] += 1
+            chosen.append(k)
+            search(k + 1,cost + W[k])
+            chosen.pop()
+            deg[u] -= 1
+            deg[v] -= 1
+            size[a] -= size[b]
+            parent[b] = b
+
+    if n == 0: return stats
+    cost = 0
+    for k in prefix:
+        a,b = find(U[k]),find(V[k])
+        if size[a] < size[b]: a,b = b,a
+        parent[b] = a
+        size[a] += size[b]
+        deg[U[k]] += 1
+        deg[V[k]] += 1
+        chosen.append(k)
+        cost += W[k]
+    search(prefix[-1] + 1 if prefix else 0,cost)
+    return stats
+
+@timed('branch_and_bound')
+def branch_and_bound(G:nx.Graph,degree_bound,ub=float('inf')) -> tuple[int,nx.Graph]:
+    '''
+    :param G: instancia a resolver
+    :param degree_bound: mapeo de las restricciones de grado para cada vértice.
+    :param ub: cota superior inicial (opcional), por ejemplo el costo de una heurística. Solo se buscan árboles de costo menor.
+
+    Ramificación y acotación sobre las aristas ordenadas por peso. Solo se construyen conjuntos acíclicos
+    (union-find incremental con deshacer) que respetan los grados (contadores por vértice). Se poda por:
+    - grado: no se agrega una arista si alguno de sus extremos ya alcanzó su restricción.
+    - incumbente: costo actual + (aristas que faltan) * (peso de la arista candidata) >= mejor costo.
+    - cota inferior: costo actual + MST de las componentes actuales usando las aristas restantes que aún
+      pueden agregarse, tratando aparte los vértices de restricción 1 (tienen que ser hojas).
+      Si ese MST no conecta todas las componentes la rama es infactible.
+
+    Devuelve el costo óptimo y el árbol óptimo (inf y un grafo sin aristas si no hay solución mejor que ub).
+    '''
+    cg = CompactGraph.from_nx(G)
+    order = _weight_order(cg)
+    best = [ub,None]
+    stats = _search(cg,cg.bounds(degree_bound),order,best)
+    for key,c in stats.items():
+        count('branch_and_bound.' + key,c)
+    if best[1] is None:
+        return float('inf'),cg.to_nx([])
+    return best[0],cg.to_nx([order[k] for k in best[1]])
+
+# instancia y mejor costo compartido, inicializados una vez en cada proceso del pool
+_cg = None
+_bound = None
+_order = None
+_incumbent = None
+
+def _init_worker(G,degree_bound,incumbent):
+    global _cg,_bound,_order,_incumbent
+    _cg = CompactGraph.from_nx(G)
+    _bound = _cg.bounds(degree_bound)
+    _order = _weight_order(_cg)
+    _incumbent = incumbent
+
+def _solve_subproblem(prefix):
+    # explora completa la rama que empieza con prefix; devuelve (costo, posiciones) del mejor árbol que encontró y los contadores
+    best = [_incumbent.value,None]
+    stats = _search(_cg,_bound,_order,best,prefix,shared=_incumbent)
+    if best[1] is None:
+        return float('inf'),None,stats
+    _,_,_,_,_,ew = _cg.lists()
+    return sum(ew[_order[k]] for k in best[1]),best[1],stats
+
+@timed('branch_and_bound')
+def parallel_branch_and_bound(G:nx.Graph,degree_bound,ub=float('inf'),workers:int=None,split_depth:int=None,tasks_per_worker:int=8) -> tuple[int,nx.Graph]:
+    '''
+    :param G: instancia a resolver
+    :param degree_bound: mapeo de las restricciones de grado para cada vértice.
+    :param ub: cota superior inicial (opcional), como en branch_and_bound.
+    :param workers: cantidad de procesos (por defecto, la cantidad de núcleos).
+    :param split_depth: cantidad de aristas elegidas en las que se corta el árbol de búsqueda. Por defecto la
+                        menor profundidad que da al menos tasks_per_worker subproblemas por proceso.
+
+    La misma búsqueda de branch_and_bound repartida entre procesos. Se recorre el árbol de búsqueda hasta
+    split_depth aristas elegidas (con las mismas podas) y cada rama que llega a esa profundidad es un
+    subproblema. Los subproblemas quedan en una cola en el orden del recorrido (primero los que empiezan con
+    las aristas más baratas) y cada proceso toma el siguiente al terminar el anterior, así que la carga se
+    reparte sola aunque las ramas tengan tamaños muy distintos. El mejor costo se comparte en memoria
+    (multiprocessing.Value): cada proceso lo lee en cada nodo para podar con la mejor solución de todos.
+
+    Devuelve el mismo costo óptimo que branch_and_bound (el árbol puede ser otro del mismo costo si hay empates).
+    '''
+    workers = workers or os.cpu_count() or 1
+    cg = CompactGraph.from_nx(G)
+    bound = cg.bounds(degree_bound)
+    order = _weight_order(cg)
+    best = [ub,None]
+    if cg.n <= 2 or workers == 1:
+        stats = _search(cg,bound,order,best)
+        best_cost,best_positions = best
+    else:
+        # profundidad de corte: los subproblemas no pueden ser árboles completos
+        for depth in ([split_depth] if split_depth else range(1,cg.n - 1)):
+            tasks = []
+            stats = _search(cg,bound,order,best,split_depth=min(depth,cg.n - 2),tasks=tasks)
+            if len(tasks) >= tasks_per_worker * workers: break
+        count('branch_and_bound.subproblems',len(tasks))
 
+        best_cost,best_positions = ub,None
+        if tasks:
+            incumbent = mp.Value('d',ub)
+            with ProcessPoolExecutor(max_workers=workers,initializer=_init_worker,initargs=(G,degree_bound,incumbent)) as pool:
+                for cost,positions,sub_stats in pool.map(_solve_subproblem,tasks):
+                    if positions is not None and cost < best_cost:
+                        best_cost,best_positions = cost,positions
+                    for key,c in sub_stats.items():
+                        stats[key] += c
+    for key,c in stats.items():
+        count('branch_and_bound.' + key,c)
+    if best_positions is None:
+        return float('inf'),cg.to_nx([])
+    return best_cost,cg.to_nx([order[k] for k in best_positions])
@@ -0,0 +1,210 @@
+'''
+Caché de resultados de los algoritmos.
+
+Las corridas se identifican por un hash canónico de la instancia (aristas con sus pesos y restricciones
+de grado), el nombre del algoritmo y sus parámetros. Los resultados se guardan en un LRU en memoria
+y, opcionalmente, en una base sqlite en disco que pueden compartir varios procesos.
+
+La versión que entra en la clave es un hash del código de los algoritmos (ver source_version), así que
+editar cualquiera de ellos invalida lo guardado sin tener que acordarse de cambiar un número.
+Un acierto devuelve el tiempo de la corrida original: los experimentos que miden tiempos no deberían
+pasar por el caché.
+
+Uso:
+    cache = SolverCache(path="solver_cache.sqlite")
+    cost, T, elapsed = cache.solve("AH", G, degree_bounds, C_max=None)
+    cache.stats()   # {'hits': ..., 'disk_hits': ..., 'misses': ..., ...}
+'''
+
+import hashlib
+import math
+import os
+import pickle
+import sqlite3
+import time
+from collections import OrderedDict
+
+import networkx as nx
+
+from utils import get_cost
+from kernelization import reduction_dcmst, kruskal_dcst
+from heuristics import dual_method
+from mst import graph_mst
+from ch import CH_Heuristic
+from ah import AH_Heuristic
+from bruteforce import bruteforce, subset_dp
+
+# archivos cuyo código determina los resultados (los algoritmos de SOLVERS y todo lo que importan)
+SOLVER_SOURCES = ('cache.py', 'ah.py', 'ch.py', 'heuristics.py', 'kernelization.py', 'bruteforce.py',
+                  'mst.py', 'compact.py', 'rooted_tree.py', 'tree_state.py', 'utils.py')
+
+
+def source_version():
+    '''
+    Hash del código de SOLVER_SOURCES. Cualquier cambio en esos archivos cambia la versión, así que
+    nunca se reutilizan resultados de una versión anterior de los algoritmos.
+    '''
+    here = os.path.dirname(os.path.abspath(__file__))
+    h = hashlib.sha256()
+    for name in SOLVER_SOURCES:
+        with open(os.path.join(here, name), 'rb') as f:
+            h.update(name.encode())
+            h.update(f.read())
+    return h.hexdigest()[:16]
+
+
+CACHE_VERSION = source_version()
+
+
+# region Algoritmos
+# Cada algoritmo recibe (G, degree_bounds, **params) y devuelve (costo, árbol)
+def _kernel(G, degree_bounds):
+    G_red, T_star = reduction_dcmst(G, degree_bounds)
+    T = kruskal_dcst(G_red, T_star, degree_bounds)
+    return get_cost(T), T
+
+def _dual(G, degree_bounds):
+    mst = graph_mst(G)
+    T = dual_method(G, mst.tree(G), degree_bounds, cg=mst.cg)
+    return get_cost(T), T
+
+SOLVERS = {
+    "Kernel+Kruskal": _kernel,
+    "Dual method": _dual,
+    "CH": CH_Heuristic,
+    "AH": AH_Heuristic,
+    "Bruteforce": bruteforce,
+    "Subset DP": subset_dp,
+}
+
+
+def instance_key(G: nx.Graph, degree_bounds, algo: str, params: dict = None):
+    '''
+    Hash canónico de (instancia, algoritmo, parámetros). No depende del orden en que se agregaron
+    los vértices o las aristas a G ni de la orientación de cada arista.
+    '''
+    edges = []
+    for u, v, w in G.edges(data='weight'):
+        a, b = sorted((repr(u), repr(v)))
+        edges.append((a, b, float(w)))
+    edges.sort()
+    bounds = sorted((repr(x), int(degree_bounds[x])) for x in G)
+    payload = repr((CACHE_VERSION, algo, edges, bounds, sorted((params or {}).items())))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class SolverCache:
+    '''
+    LRU en memoria con tamaño acotado y almacenamiento opcional en sqlite.
+
+    Las entradas son (costo, aristas del árbol, vértices del árbol, tiempo de la corrida original).
+    Al leer se reconstruye un árbol nuevo, así que los llamadores pueden modificarlo.
+    '''
+    __slots__ = ('maxsize', 'path', '_memory', '_db', 'hits', 'disk_hits', 'misses', 'saved_time')
+
+    def __init__(self, maxsize: int = 1024, path: str = None):
+        '''
+        :param maxsize: cantidad máxima de entradas en memoria
+        :param path: archivo sqlite compartido. Si es None el caché vive solo en memoria.
+        '''
+        self.maxsize = maxsize
+        self.path = path
+        self._memory = OrderedDict()
+        self._db = None
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.saved_time = 0.0
+
+    def _conn(self):
+        # la conexión se abre en el proceso que la usa (no se puede heredar entre procesos)
+        if self._db is None and self.path is not None:
+            self._db = sqlite3.connect(self.path, timeout=30)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS results (key TEXT PRIMARY KEY, value BLOB)")
+            self._db.commit()
+        return self._db
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.maxsize:
+            self._memory.popitem(last=False)
+
+    def get(self, key):
+        '''
+        Devuelve (costo, árbol, tiempo original) o None si la clave no está.
+        '''
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._memory.move_to_end(key)
+            self.hits += 1
+        else:
+            db = self._conn()
+            row = db.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone() if db else None
+            if row is None:
+                self.misses += 1
+                return None
+            entry = pickle.loads(row[0])
+            self._remember(key, entry)
+            self.disk_hits += 1
+        cost, edges, nodes, elapsed = entry
+        self.saved_time += elapsed
+        T = nx.Graph()
+        T.add_nodes_from(nodes)
+        T.add_weighted_edges_from(edges)
+        return cost, T, elapsed
+
+    def put(self, key, cost, T: nx.Graph, elapsed: float = 0.0):
+        entry = (cost, list(T.edges(data='weight')), list(T.nodes), elapsed)
+        self._remember(key, entry)
+        db = self._conn()
+        if db is not None:
+            db.execute("INSERT OR REPLACE INTO results VALUES (?, ?)", (key, pickle.dumps(entry)))
+            db.commit()
+
+    def solve(self, algo: str, G: nx.Graph, degree_bounds, **params):
+        '''
+        Ejecuta SOLVERS[algo] o devuelve el resultado guardado.
+
+        :return: (costo, árbol, tiempo de la corrida que produjo el resultado)
+        '''
+        key = instance_key(G, degree_bounds, algo, params)
+        found = self.get(key)
+        if found is not None:
+            return found
+        start = time.perf_counter()
+        cost, T = SOLVERS[algo](G, degree_bounds, **params)
+        elapsed = time.perf_counter() - start
+        self.put(key, cost, T, elapsed)
+        return cost, T, elapsed
+
+    def stats(self):
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else math.nan,
+            "saved_time": self.saved_time,
+            "size": len(self._memory),
+        }
+
+    def clear(self):
+        '''
+        Vacía la memoria y el archivo en disco, y reinicia las estadísticas.
+        '''
+        self._memory.clear()
+        db = self._conn()
+        if db is not None:
+            db.execute("DELETE FROM results")
+            db.commit()
+        self.hits = self.disk_hits = self.misses = 0
+        self.saved_time = 0.0
+
+    def __getstate__(self):
+        # al enviarse a otro proceso viaja solo la configuración; la conexión se abre allá
+        return {'maxsize': self.maxsize, 'path': self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state['maxsize'], state['path'])
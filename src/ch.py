@@ -1,5 +1,10 @@
 import networkx as nx
-from utils import get_cost
+from utils import get_cost, tree_from_edges
+from compact import CompactGraph
+from mst import graph_mst
+from rooted_tree import RootedTree
+from tree_state import TreeState
+from profiling import count, phase, timed
 
 
 def seleccionar_raiz(T: nx.Graph):
@@ -25,7 +30,31 @@ def camino_fundamental(T: nx.Graph, v: int, u: int):
         return []
 
 
-def encontrar_y_aplicar_reemplazo(T, violador, vecino, G, degree_bounds):
+def camino_a_raiz(rt: RootedTree, nodes: list, v: int, r: int):
+    '''
+    Retorna el camino entre v y la raíz r subiendo por los padres del árbol enraizado rt.
+    Equivale a camino_fundamental(T, v, r) sin recorrer T; si v no está en la componente de r retorna [].
+    :param nodes: etiquetas de los vértices de rt
+    '''
+    camino = rt.path_to_root(v)
+    count('ch.leaf_paths')
+    if camino[-1] != r:
+        return []
+    return [nodes[x] for x in camino]
+
+
+def arbol_enraizado(T: nx.Graph, cg: CompactGraph, r=None):
+    '''
+    Construye el RootedTree de T sobre los índices de cg, enraizado en r si se indica.
+    '''
+    index = cg.index
+    _, _, _, eu, ev, _ = cg.lists()
+    roots = [index[r]] if r is not None else []
+    return RootedTree(cg.n, ((eu[e], ev[e], e) for e in cg.tree_edges(T)), roots)
+
+
+def encontrar_y_aplicar_reemplazo(T, violador, vecino, G, degree_bounds, cg: CompactGraph = None, rt: RootedTree = None,
+                                  state: TreeState = None):
     """
     Intenta encontrar y aplicar un reemplazo de arista que reduzca
     el grado del violador. Similar a get_replacement_edge del método dual.
@@ -35,61 +64,91 @@ def encontrar_y_aplicar_reemplazo(T, violador, vecino, G, degree_bounds):
     :param vecino: Vecino del violador cuya arista se considera remover
     :param G: Grafo original completo
     :param degree_bounds: Restricciones de grado
+    :param cg: Representación compacta de G (opcional)
+    :param rt: Árbol enraizado de T sobre los índices de cg (opcional). Si se pasa, se actualiza junto con T.
+    :param state: Estado de T (opcional). Si se pasa, se actualiza junto con T.
     :return: True si se encontró y aplicó un reemplazo, False en caso contrario
     """
     if not T.has_edge(violador, vecino):
         return False
+    if cg is None:
+        cg = CompactGraph.from_nx(G)
+    if rt is None:
+        rt = arbol_enraizado(T, cg)
+    # si T no es conexo no hay dos partes bien definidas al quitar la arista
+    if len(rt.roots) != 1:
+        return False
     
     w_eij = T[violador][vecino]['weight']
-    deg_vecino = T.degree(vecino)
     
-    # Crear copia temporal para probar el reemplazo
-    T_temp = T.copy()
-    T_temp.remove_edge(violador, vecino)
+    # Las dos partes del árbol al remover la arista son el subárbol del hijo y el resto
+    indptr, adj, adj_edge, _, _, ew = cg.lists()
+    nodes, index = cg.nodes, cg.index
+    i_violador, i_vecino = index[violador], index[vecino]
+    c = rt.child(i_violador, i_vecino)
+    tin, tout, order = rt.euler()
+    lo, hi = tin[c], tout[c]
+    vecino_abajo = c == i_vecino
+    cc_vecino = order[lo:hi] if vecino_abajo else order[:lo] + order[hi:]
     
-    # Obtener componentes conexas después de remover la arista
-    componentes = list(nx.connected_components(T_temp))
-    if len(componentes) != 2:
-        return False
-    
-    cc_violador = componentes[0] if violador in componentes[0] else componentes[1]
-    cc_vecino = componentes[1] if violador in componentes[0] else componentes[0]
-    
-    mejor_reemplazo = None
     mejor_delta = float('inf')
+    empatados = []
     
     # Buscar arista de reemplazo válida
-    for s in cc_vecino:
-        for r in G.neighbors(s):
-            if r in cc_vecino:
+    examinadas = 0
+    for i in cc_vecino:
+        s = nodes[i]
+        # Verificar que no cause nuevas violaciones (s pierde la arista removida si es el vecino)
+        s_is_valid = T.degree(s) - (s == vecino) + 1 <= degree_bounds[s]
+        if not s_is_valid:
+            continue
+        examinadas += indptr[i + 1] - indptr[i]
+        for k in range(indptr[i], indptr[i + 1]):
+            j = adj[k]
+            if (lo <= tin[j] < hi) == vecino_abajo:
                 continue
-            if not G.has_edge(r, s):
-                continue
-            if T.has_edge(r, s):
+            if j in rt.adj[i]:
                 continue
             
-            w_ers = G[r][s]['weight']
+            w_ers = ew[adj_edge[k]]
             delta = w_ers - w_eij
+            if delta > mejor_delta:
+                continue
             
-            # Verificar que no cause nuevas violaciones
+            r = nodes[j]
             r_is_valid = T.degree(r) + 1 <= degree_bounds[r]
-            s_is_valid = (s == vecino and deg_vecino <= degree_bounds[vecino]) or (T.degree(s) + 1 <= degree_bounds[s])
             
-            if r_is_valid and s_is_valid and delta < mejor_delta:
-                mejor_delta = delta
-                mejor_reemplazo = (r, s, w_ers)
+            if r_is_valid:
+                if delta < mejor_delta:
+                    mejor_delta = delta
+                    empatados = []
+                empatados.append((r, s, w_ers, j, i, adj_edge[k]))
+    
+    count('ch.replacement_searches')
+    count('ch.candidates_examined', examinadas)
+    
+    mejor_reemplazo = empatados[0] if empatados else None
+    if len(empatados) > 1:
+        # Entre reemplazos de igual costo se elige la arista de menor id en cg (el orden de G.edges)
+        count('ch.ties')
+        mejor_reemplazo = min(empatados, key=lambda c: c[5])
     
     # Aplicar el mejor reemplazo si existe
     if mejor_reemplazo is not None:
-        r, s, w_ers = mejor_reemplazo
+        count('ch.swaps')
+        r, s, w_ers, j, i, e = mejor_reemplazo
         T.remove_edge(violador, vecino)
         T.add_weighted_edges_from([(r, s, w_ers)])
+        if state is not None:
+            state.swap(rt.adj[i_violador][i_vecino], e)
+        rt.swap(i_violador, i_vecino, j, i, e)
         return True
     
     return False
 
 
-def CH_Heuristic(G: nx.Graph, degree_bounds: dict, ub: float = None):
+@timed('ch')
+def CH_Heuristic(G: nx.Graph, degree_bounds: dict, ub: float = None, cg: CompactGraph = None, mst_edges: list = None):
     '''
     Implementa la heurística CH (Camerini-Heuristic) para árbol abarcador de costo mínimo 
     con restricción de grados.
@@ -97,16 +156,31 @@ def CH_Heuristic(G: nx.Graph, degree_bounds: dict, ub: float = None):
     :param G: Grafo con nodos V y aristas E con pesos
     :param degree_bounds: Diccionario que mapea cada vértice v a su límite máximo de grado b(v)
     :param ub: Cota superior opcional. Si se proporciona, la búsqueda puede terminar cuando el costo excede esta cota.
+    :param cg: Representación compacta de G (opcional), para reutilizarla entre llamadas sobre el mismo grafo.
+    :param mst_edges: Aristas del MST de G según nx.minimum_spanning_edges(G, data=True) (opcional), por el mismo motivo.
     :return: Tupla (costo, árbol generador mínimo factible T)
     '''
     # 1. Construcción inicial
-    T = nx.minimum_spanning_tree(G)
+    with phase('ch.mst'):
+        if mst_edges is None:
+            # MST compartido (ver mst.py); su representación compacta se reutiliza si no se pasó cg
+            mst = graph_mst(G, cg)
+            T = mst.tree(G)
+            if cg is None: cg = mst.cg
+        else:
+            T = tree_from_edges(G, mst_edges)
+    if cg is None:
+        cg = CompactGraph.from_nx(G)
     
-    # Inicializar peso de construcción actual (omega)
-    omega = get_cost(T)
+    # Estado del árbol: grados, violadores y peso de construcción actual (omega = state.cost)
+    state = TreeState(cg, cg.bounds(degree_bounds), cg.tree_edges(T))
     
     # 2. Seleccionar raíz (preferiblemente una hoja)
     r = seleccionar_raiz(T)
+    # Árbol enraizado en r: los caminos a la raíz se obtienen subiendo por los padres y
+    # se actualiza localmente con cada intercambio
+    rt = arbol_enraizado(T, cg, r)
+    nodes, index = cg.nodes, cg.index
     
     # 3. Marcar todos los vértices como NO_PROCESADOS
     procesados = set()
@@ -123,7 +197,7 @@ def CH_Heuristic(G: nx.Graph, degree_bounds: dict, ub: float = None):
     
     # Recorrer desde la hoja inicial hasta la raíz y marcar todos los vértices del camino
     if hoja_inicial is not None:
-        camino_hoja_raiz = camino_fundamental(T, hoja_inicial, r)
+        camino_hoja_raiz = camino_a_raiz(rt, nodes, index[hoja_inicial], index[r])
         if camino_hoja_raiz:
             # Marcar todos los vértices del camino como procesados
             for v_camino in camino_hoja_raiz:
@@ -138,7 +212,7 @@ def CH_Heuristic(G: nx.Graph, degree_bounds: dict, ub: float = None):
         iteration += 1
         
         # Verificar si hay violaciones
-        violadores = {v for v in T.nodes() if T.degree(v) > degree_bounds[v]}
+        violadores = {nodes[i] for i in sorted(state.violators)}
         if not violadores:
             # No hay más violaciones, terminar
             break
@@ -166,7 +240,7 @@ def CH_Heuristic(G: nx.Graph, degree_bounds: dict, ub: float = None):
                         if T.degree(violador) > degree_bounds[violador]:
                             # Intentar reducir grado del violador
                             for vecino in list(T.neighbors(violador)):
-                                if encontrar_y_aplicar_reemplazo(T, violador, vecino, G, degree_bounds):
+                                if encontrar_y_aplicar_reemplazo(T, violador, vecino, G, degree_bounds, cg=cg, rt=rt, state=state):
                                     cambio_estategia = True
                                     cambio_realizado_estrategia = True
                                     # Marcar el violador y sus vecinos si se resolvió
@@ -175,7 +249,7 @@ def CH_Heuristic(G: nx.Graph, degree_bounds: dict, ub: float = None):
                                     break
                     
                     # Actualizar lista de violadores
-                    violadores = {v for v in T.nodes() if T.degree(v) > degree_bounds[v]}
+                    violadores = {nodes[i] for i in sorted(state.violators)}
                 
                 # Si se realizaron cambios con la estrategia alternativa, continuar
                 if cambio_realizado_estrategia:
@@ -197,7 +271,7 @@ def CH_Heuristic(G: nx.Graph, degree_bounds: dict, ub: float = None):
         terminar_busqueda = False
         for v in cola_hojas:
             # Buscar el camino entre v y la raíz
-            camino_v_raiz = camino_fundamental(T, v, r)
+            camino_v_raiz = camino_a_raiz(rt, nodes, index[v], index[r])
             
             # Recorrer el camino desde v hacia la raíz hasta encontrar el primer nodo marcado
             nodo_marcado = None
@@ -289,14 +363,12 @@ def CH_Heuristic(G: nx.Graph, degree_bounds: dict, ub: float = None):
                     if T.degree(p) >= degree_bounds[p]:
                         continue
                     
-                    # Verificar que el intercambio mantenga la conectividad del árbol
-                    # (remover ⟨vecino, p3⟩ y agregar ⟨vecino, p⟩ debe resultar en un árbol)
-                    T_temp = T.copy()
-                    T_temp.remove_edge(vecino, p3)
-                    T_temp.add_weighted_edges_from([(vecino, p, G[vecino][p]['weight'])])
-                    
-                    # Verificar que sigue siendo conexo (árbol)
-                    if not nx.is_connected(T_temp):
+                    # Verificar que el intercambio mantenga la conectividad del árbol:
+                    # al remover ⟨vecino, p3⟩ se separa el subárbol de su extremo hijo, y ⟨vecino, p⟩
+                    # lo reconecta solo si vecino y p quedan en partes distintas
+                    c = rt.child(index[vecino], index[p3])
+                    count('ch.tree_checks')
+                    if rt.is_ancestor(c, index[vecino]) == rt.is_ancestor(c, index[p]):
                         continue
                     
                     # Calcular el delta (cambio en el costo)
@@ -318,17 +390,17 @@ def CH_Heuristic(G: nx.Graph, degree_bounds: dict, ub: float = None):
                     # Remover la arista antigua y agregar la nueva
                     T.remove_edge(origen_rem, destino_rem)
                     T.add_weighted_edges_from([(origen_nuevo, destino_nuevo, w_nuevo)])
-                    
-                    # Actualizar omega (peso de construcción actual)
-                    omega += mejor_delta
+                    e_nueva = cg.edge_id(index[origen_nuevo], index[destino_nuevo])
+                    state.swap(rt.adj[index[origen_rem]][index[destino_rem]], e_nueva)
+                    rt.swap(index[origen_rem], index[destino_rem], index[origen_nuevo], index[destino_nuevo], e_nueva)
+                    count('ch.swaps')
                     cambio_realizado = True
                     
                     # Verificar criterio de parada con ub
-                    if ub is not None and omega > ub:
+                    if ub is not None and state.cost > ub:
                         # Verificar si hay violaciones en todo el árbol
-                        # Si hay violaciones, continuar porque la próxima iteración podría disminuir omega
-                        violadores_actuales = {v for v in T.nodes() if T.degree(v) > degree_bounds[v]}
-                        if not violadores_actuales:
+                        # Si hay violaciones, continuar porque la próxima iteración podría disminuir el costo
+                        if not state.violators:
                             # No hay violaciones, terminar búsqueda: salir del bucle externo
                             terminar_busqueda = True
                             break
@@ -340,7 +412,7 @@ def CH_Heuristic(G: nx.Graph, degree_bounds: dict, ub: float = None):
         # Si no se realizó ningún cambio en esta iteración, verificar condiciones
         if not cambio_realizado:
             # Verificar si aún hay violaciones
-            violadores_restantes = {v for v in T.nodes() if T.degree(v) > degree_bounds[v]}
+            violadores_restantes = {nodes[i] for i in sorted(state.violators)}
             todos_marcados = len(procesados) == len(T.nodes())
             
             if violadores_restantes:
@@ -354,14 +426,14 @@ def CH_Heuristic(G: nx.Graph, degree_bounds: dict, ub: float = None):
                     for violador in list(violadores_restantes):
                         if T.degree(violador) > degree_bounds[violador]:
                             for vecino in list(T.neighbors(violador)):
-                                if encontrar_y_aplicar_reemplazo(T, violador, vecino, G, degree_bounds):
+                                if encontrar_y_aplicar_reemplazo(T, violador, vecino, G, degree_bounds, cg=cg, rt=rt, state=state):
                                     cambio_estategia = True
                                     cambio_realizado_estrategia = True
                                     if T.degree(violador) <= degree_bounds[violador]:
                                         procesados.add(violador)
                                     break
                     
-                    violadores_restantes = {v for v in T.nodes() if T.degree(v) > degree_bounds[v]}
+                    violadores_restantes = {nodes[i] for i in sorted(state.violators)}
                 
                 # Si se realizaron cambios, continuar en la siguiente iteración
                 if cambio_realizado_estrategia:
@@ -380,7 +452,7 @@ def CH_Heuristic(G: nx.Graph, degree_bounds: dict, ub: float = None):
                 break
     
     # Retornar el árbol resultante
-    # Calcular el costo final para asegurar precisión (omega puede tener errores de redondeo acumulados)
+    # Calcular el costo final para asegurar precisión (state.cost puede tener errores de redondeo acumulados)
     costo_final = get_cost(T)
     return costo_final, T
 
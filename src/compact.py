@@ -0,0 +1,140 @@
+'''
+Representación compacta de grafos para los algoritmos.
+
+Los algoritmos reciben y devuelven grafos de networkx, pero internamente trabajan
+sobre CompactGraph: los vértices se enumeran de 0 a n-1 y las aristas se guardan
+en arreglos (extremos y peso) junto con una adyacencia CSR.
+'''
+
+import numpy as np
+import networkx as nx
+
+
+class CompactGraph:
+    '''
+    Grafo no dirigido almacenado en arreglos.
+
+    - nodes: etiquetas originales, nodes[i] es la etiqueta del vértice i.
+    - index: mapeo etiqueta -> entero.
+    - eu, ev, ew: extremos y peso de cada arista, la arista k es (eu[k], ev[k]).
+    - indptr, adj, adj_edge: adyacencia CSR. Los vecinos de i son adj[indptr[i]:indptr[i+1]]
+      y adj_edge guarda el id de la arista que los une.
+    '''
+    __slots__ = ('nodes', 'index', 'n', 'm', 'eu', 'ev', 'ew',
+                 'indptr', 'adj', 'adj_edge', '_edge_id', '_lists', '_by_weight')
+
+    def __init__(self, nodes, eu, ev, ew):
+        self.nodes = list(nodes)
+        self.index = {x: i for i, x in enumerate(self.nodes)}
+        self.n = len(self.nodes)
+        self.eu = np.asarray(eu, dtype=np.int64)
+        self.ev = np.asarray(ev, dtype=np.int64)
+        self.ew = np.asarray(ew)
+        self.m = len(self.eu)
+
+        # adyacencia CSR: cada arista aparece una vez en la fila de cada extremo
+        ids = np.arange(self.m, dtype=np.int64)
+        src = np.concatenate([self.eu, self.ev])
+        order = np.argsort(src, kind='stable')
+        self.adj = np.concatenate([self.ev, self.eu])[order]
+        self.adj_edge = np.concatenate([ids, ids])[order]
+        self.indptr = np.zeros(self.n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=self.n), out=self.indptr[1:])
+
+        self._edge_id = None
+        self._lists = None
+        self._by_weight = None
+
+    @classmethod
+    def from_nx(cls, G: nx.Graph, nodes=None):
+        '''
+        :param G: grafo con pesos en el atributo 'weight'
+        :param nodes: orden opcional de los vértices. Los vértices de G que no aparezcan se agregan al final.
+        '''
+        nodes = list(G) if nodes is None else list(nodes)
+        index = {x: i for i, x in enumerate(nodes)}
+        for x in G:
+            if x not in index:
+                index[x] = len(nodes)
+                nodes.append(x)
+        eu, ev, ew = [], [], []
+        for u, v, w in G.edges(data='weight'):
+            eu.append(index[u])
+            ev.append(index[v])
+            ew.append(w)
+        return cls(nodes, eu, ev, ew)
+
+    def lists(self):
+        '''
+        Devuelve (indptr, adj, adj_edge, eu, ev, ew) como listas de Python.
+        Acceder elemento a elemento a una lista es mucho más barato que a un arreglo de numpy,
+        por lo que los ciclos internos de los algoritmos usan esta vista.
+        '''
+        if self._lists is None:
+            self._lists = (self.indptr.tolist(), self.adj.tolist(), self.adj_edge.tolist(),
+                           self.eu.tolist(), self.ev.tolist(), self.ew.tolist())
+        return self._lists
+
+    def by_weight(self):
+        '''
+        Devuelve los ids de las aristas ordenados por peso (orden estable). Se calcula una sola vez.
+        '''
+        if self._by_weight is None:
+            self._by_weight = np.argsort(self.ew, kind='stable').tolist()
+        return self._by_weight
+
+    def edge_index(self):
+        '''
+        Devuelve el diccionario (i, j) -> id de arista, en las dos orientaciones. Se calcula una sola vez;
+        llamarlo de antemano deja armado el índice que usa edge_id.
+        '''
+        if self._edge_id is None:
+            _, _, _, eu, ev, _ = self.lists()
+            self._edge_id = {}
+            for k in range(self.m):
+                self._edge_id[(eu[k], ev[k])] = k
+                self._edge_id[(ev[k], eu[k])] = k
+        return self._edge_id
+
+    def edge_id(self, i, j):
+        '''
+        Devuelve el id de la arista entre los vértices i y j, o -1 si no existe.
+        '''
+        return self.edge_index().get((i, j), -1)
+
+    def bounds(self, degree_bounds):
+        '''
+        Devuelve las restricciones de grado como lista indexada por vértice.
+        '''
+        return [degree_bounds[x] for x in self.nodes]
+
+    def tree_edges(self, T: nx.Graph):
+        '''
+        Devuelve los ids de las aristas de T. Todas las aristas de T deben pertenecer al grafo.
+        '''
+        index = self.index
+        return [self.edge_id(index[u], index[v]) for u, v in T.edges]
+
+    def tree_degrees(self, T: nx.Graph):
+        '''
+        Devuelve el arreglo de grados de T indexado por vértice.
+        '''
+        index = self.index
+        deg = [0] * self.n
+        for u, v in T.edges:
+            deg[index[u]] += 1
+            deg[index[v]] += 1
+        return deg
+
+    def to_nx(self, edge_ids=None):
+        '''
+        Construye un nx.Graph con todos los vértices y las aristas indicadas (todas si edge_ids es None).
+        '''
+        _, _, _, eu, ev, ew = self.lists()
+        nodes = self.nodes
+        if edge_ids is None:
+            edge_ids = range(self.m)
+        T = nx.Graph()
+        T.add_nodes_from(nodes)
+        T.add_weighted_edges_from((nodes[eu[k]], nodes[ev[k]], ew[k]) for k in edge_ids)
+        return T
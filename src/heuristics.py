@@ -1,60 +1,100 @@
 import networkx as nx
 from utils import *
+from compact import CompactGraph
+from rooted_tree import RootedTree
+from tree_state import TreeState
+from profiling import count, timed
 
-def dual_method(G:nx.Graph, T_star:nx.Graph, degree_bounds):
-        for i in T_star.nodes:
-            if T_star.degree(i) <= degree_bounds[i]: continue
-            while T_star.degree(i) > degree_bounds[i]:
-                p = {}
-                ers_exists = False
-
-                for j in T_star.neighbors(i):
-                    w_eij = T_star[i][j]['weight']
-                    ers,pj = get_replacement_edge(i,j,w_eij,T_star.copy(),G,degree_bounds)
-                    if ers is not None:
-                        ers_exists = True
-                        p[j] = (ers,pj)
-                
-                if not ers_exists: return T_star # No existe solución factible
-                
-                j,ers,pj = get_best_replacement_edge(p)
-                r,s = ers
-                w_ers = pj + w_eij
-                T_star.remove_edge(i,j)
-                T_star.add_weighted_edges_from([(r,s,w_ers)])
+@timed('dual')
+def dual_method(G:nx.Graph, T_star:nx.Graph, degree_bounds, cg:CompactGraph=None):
+        # cg (opcional) es la representación compacta de G ya construida; se puede reutilizar entre llamadas
+        if cg is None: cg = CompactGraph.from_nx(G,nodes=T_star)
+        _,_,_,eu,ev,ew = cg.lists()
+        tree_edges = cg.tree_edges(T_star)
+        state = TreeState(cg,cg.bounds(degree_bounds),tree_edges)
+        tree = RootedTree(cg.n,((eu[e],ev[e],e) for e in tree_edges))
+        reduce_violations(cg,tree,state)
 
+        nodes = cg.nodes
+        T_star.remove_edges_from(list(T_star.edges))
+        T_star.add_weighted_edges_from((nodes[eu[e]],nodes[ev[e]],ew[e]) for x in range(cg.n) for y,e in tree.adj[x].items() if x < y)
         return T_star
-            
-def get_replacement_edge(i,j, w_eij: int, MST: nx.Graph, G: nx.Graph, degree_bounds):
-    best = float('inf')
-    deg_j = MST.degree(j)
-    MST.remove_edge(i,j)
-    cc1,cc2 = nx.connected_components(MST)
-    ccj = cc1 if j in cc1 else cc2
-    ers = None
-    for s in ccj:
-        for r in G.neighbors(s):
-            if r in ccj: continue
-            w_ers = G[r][s]['weight']
-            pj = w_ers - w_eij
-            
-            r_is_valid = MST.degree(r) + 1 <= degree_bounds[r]
-            s_is_valid = (s == j and deg_j <= degree_bounds[j]) or MST.degree(s) + 1 <= degree_bounds[s]
-            
-            if pj < best and r_is_valid and s_is_valid:
-                best = pj
-                ers = (r,s)
-    return ers, best
+
+def reduce_violations(cg:CompactGraph, tree:RootedTree, state:TreeState):
+    '''
+    Intercambios del método dual sobre un árbol ya armado: para cada vértice que viola su restricción
+    se quita la arista incidente cuyo mejor reemplazo (que no viole grados) es el más barato, hasta que
+    deje de violarla. tree y state se actualizan con cada intercambio.
+    Devuelve la lista de intercambios (arista quitada, arista agregada).
+    '''
+    _,_,_,eu,ev,_ = cg.lists()
+    deg,bound = state.deg,state.bound
+    # candidatos por arista del árbol: aristas que cruzan su corte, ordenadas por peso
+    cand = {}
+    swaps = []
+
+    # los reemplazos nunca crean violadores nuevos, así que basta recorrer los iniciales en orden
+    for i in sorted(state.violators):
+        while deg[i] > bound[i]:
+            p = {}
+            ers_exists = False
+
+            for j,eij in tree.adj[i].items():
+                ers,pj = get_replacement_edge(i,j,eij,tree,cand,deg,cg,bound)
+                if ers is not None:
+                    ers_exists = True
+                    p[j] = (ers,pj)
+
+            if not ers_exists: break # No existe solución factible
+
+            j,ers,pj = get_best_replacement_edge(p)
+            r,s = eu[ers],ev[ers]
+            # cambian los cortes de las aristas del ciclo que cierra (r,s)
+            for e in tree.path_edges(r,s):
+                cand.pop(e,None)
+            swaps.append((tree.adj[i][j],ers))
+            state.swap(tree.adj[i][j],ers)
+            tree.swap(i,j,r,s,ers)
+            count('dual.swaps')
+        else: continue
+        break
+    return swaps
+
+def get_replacement_edge(i,j, eij: int, tree: RootedTree, cand: dict, deg: list[int], cg: CompactGraph, bound: list[int]):
+    '''
+    Busca la arista (r,s) de menor costo que reconecta el árbol al quitar (i,j), con s del lado de j.
+    El lado de cada vértice se consulta con los intervalos de Euler del árbol, sin copiarlo.
+    Las aristas que cruzan el corte se calculan una vez por arista del árbol y se guardan en cand.
+    Devuelve el id de la arista y la penalización w_rs - w_ij.
+    '''
+    _,_,_,eu,ev,ew = cg.lists()
+    c = tree.child(i,j)
+    if eij not in cand:
+        cand[eij] = tree.crossing_edges(c,cg)
+        count('dual.cut_scans')
+    j_inside = c == j
+    for n_seen,k in enumerate(cand[eij],1):
+        s,r = eu[k],ev[k]
+        if tree.in_subtree(c,s) != j_inside: s,r = r,s
+        # al quitar (i,j) los grados de i y j bajan en uno
+        s_is_valid = deg[s] - (s == j) + 1 <= bound[s]
+        r_is_valid = deg[r] - (r == i) + 1 <= bound[r]
+        if r_is_valid and s_is_valid:
+            count('dual.candidates_examined',n_seen)
+            return k, ew[k] - ew[eij]
+    count('dual.candidates_examined',len(cand[eij]))
+    return None, float('inf')
 
 def get_best_replacement_edge(p:dict[tuple,int]):
     if len(p) == 0:
-        print('No hay ningún j válido.')
+        count('dual.no_valid_replacement')
         return
     best = float('inf')
     j = None
     for k in p:
         _,pj = p[k]
         if pj < best:
+            best = pj
             j = k
     ers,pj = p[j]
-    return j,ers,pj
\ No newline at end of file
+    return j,ers,pj
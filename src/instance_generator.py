@@ -1,4 +1,5 @@
 import random
+import numpy as np
 from collections import defaultdict
 from utils import *
 
@@ -66,4 +67,77 @@ def generate_instance(n,
         else:
             degree_bounds[i] = random.randint(deg[i],deg[i] + 2)
 
-    return edges,degree_bounds
\ No newline at end of file
+    return edges,degree_bounds
+
+def generate_instance_np(n,
+                         edge_prob=0.4,
+                         w_min=1,
+                         w_max=10,
+                         violation_prob=0.4,
+                         seed=None) -> tuple[np.ndarray,np.ndarray,np.ndarray,np.ndarray]:
+    '''
+    Versión con numpy de generate_instance para instancias grandes y ralas.
+    Los parámetros significan lo mismo, pero las instancias no coinciden con las de generate_instance
+    para la misma semilla. El tiempo es proporcional a la cantidad de aristas generadas.
+
+    :param n: cantidad de vértices del grafo
+    :param edge_prob: probabilidad de que entre un par de vértices haya una arista
+    :param w_min: costo mínimo de arista
+    :param w_max: costo máximo de arista
+    :param violation_prob: probabilidad de que un vértice viole su restricción de grado
+    :param seed: semilla
+
+    returns: (eu, ev, w, degree_bounds). La arista k es (eu[k], ev[k]) con peso w[k]; las primeras n-1
+    forman el árbol base y degree_bounds[i] es la restricción del vértice i.
+    '''
+    rng = np.random.default_rng(seed)
+
+    # con menos de dos vértices no hay aristas; las restricciones quedan entre 0 y 2 como en generate_instance
+    if n < 2:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty.copy(), empty.copy(), rng.integers(0, 3, n)
+
+    # árbol base: cada vértice de la permutación se cuelga de uno anterior elegido al azar
+    vertices = rng.permutation(n)
+    pos = np.arange(1, n)
+    tree_u = vertices[1:]
+    tree_v = vertices[(rng.random(n - 1) * pos).astype(np.int64)]
+    tree_w = rng.integers(w_min, w_min + 3, n - 1)
+
+    # aristas extra: la cantidad es binomial sobre los pares libres y los pares se muestrean sin repetir.
+    # Se piden n-1 pares de más para poder descartar los que ya están en el árbol base.
+    pairs = n * (n - 1) // 2
+    k = int(rng.binomial(pairs - (n - 1), edge_prob)) if pairs > n - 1 else 0
+    sample = rng.choice(pairs, size=min(pairs, k + n - 1), replace=False)
+    lo, hi = np.minimum(tree_u, tree_v), np.maximum(tree_u, tree_v)
+    sample = sample[~np.isin(sample, hi * (hi - 1) // 2 + lo)][:k]
+    extra_u, extra_v = _pair_from_index(sample)
+    # mismo orden que el doble ciclo de generate_instance
+    order = np.lexsort((extra_v, extra_u))
+    extra_u, extra_v = extra_u[order], extra_v[order]
+    extra_w = rng.integers(w_min + 3, w_max + 1, len(extra_u))
+
+    eu = np.concatenate([tree_u, extra_u])
+    ev = np.concatenate([tree_v, extra_v])
+    w = np.concatenate([tree_w, extra_w])
+
+    # restricciones de grado a partir del grado en el árbol base
+    deg = np.bincount(tree_u, minlength=n) + np.bincount(tree_v, minlength=n)
+    violate = (rng.random(n) < violation_prob) & (deg > 1)
+    below = rng.integers(1, np.maximum(deg, 2))     # entre 1 y deg-1
+    above = rng.integers(deg, deg + 3)              # entre deg y deg+2
+    degree_bounds = np.where(violate, below, above)
+
+    return eu, ev, w, degree_bounds
+
+
+def _pair_from_index(t):
+    '''
+    Convierte índices t = j(j-1)/2 + i del triángulo inferior en los pares (i, j) con i < j.
+    '''
+    t = np.asarray(t, dtype=np.int64)
+    j = ((1 + np.sqrt(1 + 8 * t.astype(np.float64))) / 2).astype(np.int64)
+    # corrección del redondeo de la raíz
+    j -= j * (j - 1) // 2 > t
+    j += (j + 1) * j // 2 <= t
+    return t - j * (j - 1) // 2, j
@@ -0,0 +1,103 @@
+'''
+Formato binario para guardar instancias de DC-MST en disco.
+
+El archivo tiene un encabezado de 32 bytes seguido de cuatro arreglos contiguos:
+
+    encabezado: magic (8 bytes) | n (int64) | m (int64) | tipo de los pesos (int64: 0 = int64, 1 = float64)
+    eu: int64[m] | ev: int64[m] | w: int64[m] o float64[m] | degree_bounds: int64[n]
+
+Los arreglos se leen con numpy.memmap, así que varios procesos pueden abrir la misma instancia y
+el sistema operativo comparte las páginas entre ellos sin copiarlas ni serializarlas.
+'''
+
+import numpy as np
+import networkx as nx
+from compact import CompactGraph
+
+MAGIC = b'DCMST001'
+HEADER = np.dtype([('magic', 'S8'), ('n', '<i8'), ('m', '<i8'), ('weight', '<i8')])
+WEIGHT_DTYPES = [np.dtype('<i8'), np.dtype('<f8')]
+
+
+def write_instance(path, eu, ev, w, degree_bounds, n=None):
+    '''
+    :param path: archivo de salida
+    :param eu, ev, w: extremos y peso de cada arista (arreglos o listas)
+    :param degree_bounds: restricción de cada vértice, como arreglo indexado por vértice o diccionario
+    :param n: cantidad de vértices. Por defecto se deduce de degree_bounds y de las aristas.
+
+    Los vértices deben ser los enteros 0..n-1, como los que produce instance_generator.
+    '''
+    eu = np.asarray(eu, dtype='<i8')
+    ev = np.asarray(ev, dtype='<i8')
+    w = np.asarray(w)
+    weight = 1 if np.issubdtype(w.dtype, np.floating) else 0
+    w = w.astype(WEIGHT_DTYPES[weight])
+    if isinstance(degree_bounds, dict):
+        if n is None:
+            n = max(max(degree_bounds, default=-1), int(eu.max(initial=-1)), int(ev.max(initial=-1))) + 1
+        bounds = np.array([degree_bounds.get(i, 0) for i in range(n)], dtype='<i8')
+    else:
+        bounds = np.asarray(degree_bounds, dtype='<i8')
+        n = len(bounds) if n is None else n
+    if len(bounds) != n:
+        raise ValueError(f'degree_bounds tiene {len(bounds)} valores y la instancia {n} vértices')
+    if not len(eu) == len(ev) == len(w):
+        raise ValueError('eu, ev y w deben tener el mismo largo')
+
+    header = np.array([(MAGIC, n, len(eu), weight)], dtype=HEADER)
+    with open(path, 'wb') as f:
+        f.write(header.tobytes())
+        for a in (eu, ev, w, bounds):
+            f.write(a.tobytes())
+
+
+def write_edge_list(path, edges, degree_bounds, n):
+    '''
+    Guarda una instancia en el formato de generate_instance: edges = [[u, v, w], ...].
+    '''
+    a = np.asarray(edges).reshape(-1, 3)
+    write_instance(path, a[:, 0], a[:, 1], a[:, 2], degree_bounds, n)
+
+
+def read_instance(path, mmap=True):
+    '''
+    Lee una instancia escrita por write_instance.
+
+    :param mmap: si es True los arreglos son numpy.memmap de solo lectura; si no, se cargan en memoria
+    :return: (eu, ev, w, degree_bounds)
+    '''
+    header = np.fromfile(path, dtype=HEADER, count=1)
+    if len(header) == 0 or header['magic'][0] != MAGIC:
+        raise ValueError(f'{path} no es una instancia DC-MST')
+    n, m, weight = int(header['n'][0]), int(header['m'][0]), int(header['weight'][0])
+
+    offset = HEADER.itemsize
+    arrays = []
+    for dtype, size in ((np.dtype('<i8'), m), (np.dtype('<i8'), m), (WEIGHT_DTYPES[weight], m), (np.dtype('<i8'), n)):
+        if mmap and size:
+            arrays.append(np.memmap(path, dtype=dtype, mode='r', offset=offset, shape=(size,)))
+        else:
+            arrays.append(np.fromfile(path, dtype=dtype, count=size, offset=offset))
+        offset += dtype.itemsize * size
+    return tuple(arrays)
+
+
+def to_nx(eu, ev, w, degree_bounds):
+    '''
+    Construye las entradas de los algoritmos: (G, degree_bounds) con G un nx.Graph con pesos
+    y degree_bounds un diccionario vértice -> restricción.
+    '''
+    G = nx.Graph()
+    G.add_nodes_from(range(len(degree_bounds)))
+    G.add_weighted_edges_from(zip(np.asarray(eu).tolist(), np.asarray(ev).tolist(), np.asarray(w).tolist()))
+    return G, dict(enumerate(np.asarray(degree_bounds).tolist()))
+
+
+def to_compact(eu, ev, w, degree_bounds):
+    '''
+    Construye (CompactGraph, bound) directamente desde los arreglos, sin pasar por networkx.
+    bound es la lista de restricciones indexada por vértice, como la que devuelve CompactGraph.bounds.
+    '''
+    n = len(degree_bounds)
+    return CompactGraph(range(n), eu, ev, w), np.asarray(degree_bounds).tolist()
@@ -1,74 +1,210 @@
-import heapq
+from collections import deque
+import numpy as np
 import networkx as nx
 from utils import *
+from compact import CompactGraph
+from profiling import count, phase, timed
 
-def reduction_dcmst(G:nx.Graph,degree_bounds):
+@timed('kernel.reduction')
+def reduction_dcmst(G:nx.Graph,degree_bounds,stats:dict=None,cg:CompactGraph=None,bridges:list[bool]=None):
     '''
     :param G: Grafo inicial
     :type G: nx.Graph
     :param degree_bounds: restricciones de grado para cada vértice
+    :param stats: diccionario opcional donde se acumula lo que eliminó cada regla:
+                  theorem1 y theorem3 cuentan vértices, theorem2 cuenta aristas
+    :param cg: CompactGraph.from_nx(G) ya construido (opcional), para reutilizarlo entre varias restricciones de grado
+    :param bridges: puentes de G completo según find_bridges (opcional). Se reutilizan si el Teorema 2 no quita aristas.
 
     Devuelve un grafo T_star candidato a conectar para hallar un DCST
+
+    El Teorema 2 depende solo de las cotas, así que se aplica una vez al principio. Después, los
+    Teoremas 1 y 3 solo eliminan puentes, y quitar un puente no cambia cuáles de las otras aristas
+    son puentes: basta un único recorrido de Tarjan para saber si un vértice de grado 2 es de corte
+    entre sus dos vecinos (sus dos aristas son puentes). Los vértices se revisan desde una lista de
+    trabajo a la que vuelven cuando cambia su grado.
     '''
     G = G.copy()
+    count('kernel.graph_copies')
     if len(G) <= 2: return G,G
     # Inicialización
-    T_star = nx.Graph()
-    T_star.add_nodes_from(G)
-    
-    changed = True
-    while changed:
-        changed = False
-        # Paso 1: Teorema 2
-        to_remove = set()
-        for u,v,_ in G.edges.data():
-            if degree_bounds[u] == degree_bounds[v] == 1:
-                to_remove.add((u,v))
-                changed = True
-        G.remove_edges_from(to_remove)
-        to_remove.clear()
-    
-        # Paso 2: Teorema 1
-        for u in G:
-            if G.degree(u) == 1:
-                v = list(G.neighbors(u))[0]
-                T_star.add_edge(u,v,weight=G[u][v]['weight'])
-                G.remove_edge(u,v)
-                to_remove.add(u)
-                changed = True
-        G.remove_nodes_from(to_remove)
-        to_remove.clear()
-
-        # Paso 3: Teorema 3
-        for vk in G:
-            if G.degree(vk) != 2: continue
-            vi,vj = G.neighbors(vk)
-            G_prime = G.copy()
-            G_prime.remove_node(vk)
-            if not nx.has_path(G_prime,vi,vj):
-                T_star.add_edge(vi,vk,weight=G[vi][vk]['weight'])
-                T_star.add_edge(vj,vk,weight=G[vj][vk]['weight'])
-                G.remove_edge(vi,vk)
-                G.remove_edge(vj,vk)
-                to_remove.add(vk)
-                changed = True
-        G.remove_nodes_from(to_remove)
+    if cg is None: cg = CompactGraph.from_nx(G)
+    indptr,adj,adj_edge,eu,ev,ew = cg.lists()
+    bound = cg.bounds(degree_bounds)
+    alive = [True] * cg.m               # aristas que siguen en G
+    deg = [indptr[i+1] - indptr[i] for i in range(cg.n)]
+    removed = [False] * cg.n            # vértices eliminados de G
+    fixed = []                          # aristas que pasan a T_star
+    removed_by = {'theorem1': 0, 'theorem2': 0, 'theorem3': 0}
+
+    def alive_neighbors(u):
+        for k in range(indptr[u],indptr[u+1]):
+            if alive[adj_edge[k]]: yield adj[k],adj_edge[k]
+
+    def kill(e):
+        alive[e] = False
+        deg[eu[e]] -= 1
+        deg[ev[e]] -= 1
+
+    # Teorema 2
+    for e in range(cg.m):
+        if bound[eu[e]] == bound[ev[e]] == 1:
+            kill(e)
+            removed_by['theorem2'] += 1
+
+    if bridges is not None and not removed_by['theorem2']:
+        bridge = bridges
+    else:
+        with phase('kernel.bridges'):
+            bridge = find_bridges(cg,alive)
+        count('kernel.bridge_passes')
+
+    # Teoremas 1 y 3. Como en el orden original, se agotan las hojas antes de mirar los vértices de grado 2
+    leaves = deque(u for u in range(cg.n) if deg[u] == 1)
+    pending = deque(u for u in range(cg.n) if deg[u] == 2)
+    while leaves or pending:
+        u = leaves.popleft() if leaves else pending.popleft()
+        if removed[u]: continue
+        if deg[u] == 1:
+            removed_by['theorem1'] += 1
+        elif deg[u] == 2:
+            (_,ei),(_,ej) = alive_neighbors(u)
+            if not (bridge[ei] and bridge[ej]): continue
+            removed_by['theorem3'] += 1
+        else: continue
+        for v,e in list(alive_neighbors(u)):
+            fixed.append(e)
+            kill(e)
+            if deg[v] == 1: leaves.append(v)
+            elif deg[v] == 2: pending.append(v)
+        removed[u] = True
+
+    for rule,c in removed_by.items():
+        count('kernel.' + rule,c)
+        if stats is not None:
+            stats[rule] = stats.get(rule,0) + c
+
+    nodes = cg.nodes
+    T_star = cg.to_nx(fixed)
+    G.remove_edges_from((nodes[eu[e]],nodes[ev[e]]) for e in range(cg.m) if not alive[e])
+    G.remove_nodes_from(nodes[u] for u in range(cg.n) if removed[u])
     return G,T_star
 
+def find_bridges(cg:CompactGraph,alive:list[bool]):
+    '''
+    Algoritmo de Tarjan (iterativo) sobre las aristas vivas de cg.
+    Devuelve una lista con bridge[e] = True si la arista e es un puente.
+    '''
+    indptr,adj,adj_edge,_,_,_ = cg.lists()
+    n = cg.n
+    bridge = [False] * cg.m
+    tin = [-1] * n
+    low = [0] * n
+    timer = 0
+    for r in range(n):
+        if tin[r] != -1: continue
+        tin[r] = low[r] = timer
+        timer += 1
+        # pila de (vértice, arista por la que se llegó, siguiente posición de la adyacencia)
+        stack = [(r,-1,indptr[r])]
+        while stack:
+            x,pe,k = stack[-1]
+            if k < indptr[x+1]:
+                stack[-1] = (x,pe,k+1)
+                e = adj_edge[k]
+                if not alive[e] or e == pe: continue
+                y = adj[k]
+                if tin[y] == -1:
+                    tin[y] = low[y] = timer
+                    timer += 1
+                    stack.append((y,e,indptr[y]))
+                elif tin[y] < low[x]:
+                    low[x] = tin[y]
+                continue
+            stack.pop()
+            if stack:
+                p = stack[-1][0]
+                if low[x] < low[p]: low[p] = low[x]
+                if low[x] > tin[p]: bridge[pe] = True
+    return bridge
+
+@timed('kernel.kruskal')
 def kruskal_dcst(G:nx.Graph,T_star:nx.Graph,degree_bounds):
-    uf = {v:v for v in T_star}
-    for u,v in T_star.edges:
-        merge(u,v,uf)
-
-    q = [(w['weight'],u,v) for u,v,w in G.edges.data()]
-    heapq.heapify(q)
-
-    while q and len(T_star.edges) < len(T_star) - 1:
-        w,u,v = heapq.heappop(q)
-        if set_of(u,uf) == set_of(v,uf): continue 
-        if T_star.degree(u) + 1 > degree_bounds[u]: continue 
-        if T_star.degree(v) + 1 > degree_bounds[v]: continue
-        merge(u,v,uf)
-        T_star.add_edge(u,v,weight=w)
-
-    return T_star
\ No newline at end of file
+    '''
+    Completa T_star con las aristas más baratas de G que unen componentes distintas y respetan las
+    restricciones de grado.
+    '''
+    cg = CompactGraph.from_nx(G,nodes=T_star)
+    nodes = cg.nodes
+    index = cg.index
+    missing = len(T_star) - 1 - T_star.number_of_edges()
+    fixed = ((index[u],index[v]) for u,v in T_star.edges)
+    added = kruskal_dcst_compact(cg,cg.bounds(degree_bounds),fixed,missing)
+
+    _,_,_,eu,ev,ew = cg.lists()
+    T_star.add_weighted_edges_from((nodes[eu[e]],nodes[ev[e]],ew[e]) for e in added)
+    return T_star
+
+def kruskal_order(cg:CompactGraph):
+    '''
+    Ids de las aristas de cg ordenados por (peso, etiqueta de u, etiqueta de v), el mismo orden en que
+    las extraería un heap de tuplas (w,u,v).
+    '''
+    # posición de cada etiqueta en orden creciente, para desempatar como el heap
+    label_rank = np.empty(cg.n,dtype=np.int64)
+    label_rank[sorted(range(cg.n),key=cg.nodes.__getitem__)] = np.arange(cg.n)
+    return np.lexsort((label_rank[cg.ev],label_rank[cg.eu],cg.ew))
+
+def kruskal_dcst_compact(cg:CompactGraph,bound:list[int],fixed=(),missing:int=None,order=None):
+    '''
+    Kruskal con restricciones de grado directamente sobre los arreglos de cg.
+
+    :param bound: restricción de grado de cada vértice (índices de cg)
+    :param fixed: pares (i,j) de vértices que ya están unidos en el árbol (por ejemplo las aristas de T_star)
+    :param missing: cantidad de aristas a agregar. Por defecto n-1 menos las aristas de fixed.
+    :param order: ids de las aristas que se pueden usar, en el orden de kruskal_order (opcional, por defecto todas)
+
+    Las aristas se ordenan una sola vez con numpy (ver kruskal_order). El union-find usa rango y
+    compresión por mitades sobre listas planas, y los grados se llevan en una lista.
+    Devuelve los ids de las aristas agregadas.
+    '''
+    n = cg.n
+    uf = list(range(n))
+    rank = [0] * n
+    deg = [0] * n
+    n_fixed = 0
+    for u,v in fixed:
+        merge(u,v,uf,rank)
+        deg[u] += 1
+        deg[v] += 1
+        n_fixed += 1
+    if missing is None: missing = n - 1 - n_fixed
+    if missing <= 0 or cg.m == 0: return []
+    order = kruskal_order(cg) if order is None else np.asarray(order,dtype=np.int64)
+    if len(order) == 0: return []
+    su,sv,order = cg.eu[order].tolist(),cg.ev[order].tolist(),order.tolist()
+
+    added = []
+    for k in range(len(order)):
+        u,v = su[k],sv[k]
+        if deg[u] >= bound[u] or deg[v] >= bound[v]: continue
+        # set_of de utils, escrito en línea porque es el ciclo caliente
+        a = u
+        while uf[a] != a:
+            uf[a] = uf[uf[a]]
+            a = uf[a]
+        b = v
+        while uf[b] != b:
+            uf[b] = uf[uf[b]]
+            b = uf[b]
+        if a == b: continue
+        if rank[a] < rank[b]: a,b = b,a
+        if rank[a] == rank[b]: rank[a] += 1
+        uf[b] = a
+        deg[u] += 1
+        deg[v] += 1
+        added.append(order[k])
+        if len(added) == missing: break
+    count('kruskal.edges_scanned',k + 1)
+    count('kruskal.edges_added',len(added))
+    return added
@@ -0,0 +1,145 @@
+'''
+Cota inferior por relajación lagrangiana de las restricciones de grado.
+
+Se relaja sum_{e incidente a v} x_e <= d(v) con multiplicadores lambda_v >= 0:
+
+    L(lambda) = min_T sum_{(u,v) en T} (w_uv + lambda_u + lambda_v) - sum_v lambda_v d(v)
+
+Para cada lambda, L(lambda) es una cota inferior del DC-MST y se calcula con un MST sobre los
+costos penalizados. Los multiplicadores se ajustan por subgradiente (paso de Polyak).
+'''
+
+import math
+import numpy as np
+import networkx as nx
+from compact import CompactGraph
+
+
+def lagrangian_bound(G: nx.Graph, degree_bounds, ub: float = None, max_iter: int = 300,
+                     theta: float = 2.0, patience: int = 10, tol: float = 1e-6):
+    '''
+    :param G: instancia a resolver
+    :param degree_bounds: restricciones de grado para cada vértice
+    :param ub: cota superior conocida (opcional), por ejemplo el costo de la mejor heurística. Guía el tamaño del paso.
+    :param max_iter: cantidad máxima de iteraciones del subgradiente
+    :param theta: factor inicial del paso de Polyak, se divide a la mitad tras 'patience' iteraciones sin mejora
+    :param tol: se detiene cuando theta o la brecha ub - cota caen por debajo de este valor
+
+    Devuelve un diccionario con:
+    - lower_bound: mejor cota inferior encontrada (redondeada hacia arriba si los pesos son enteros)
+    - upper_bound: mejor costo factible conocido (ub o un árbol lagrangiano que respetó los grados)
+    - multipliers: {v: lambda_v} en la mejor cota
+    - reduced_costs: {(u,v): w_uv + lambda_u + lambda_v} en la mejor cota
+    - tree: árbol lagrangiano de la mejor cota
+    - feasible_tree: mejor árbol lagrangiano que respetó los grados (o None)
+    - optimal: True si se certificó que upper_bound es óptimo
+    - iterations: iteraciones realizadas
+    '''
+    cg = CompactGraph.from_nx(G)
+    n, m = cg.n, cg.m
+    eu, ev = cg.eu, cg.ev
+    w = cg.ew.astype(np.float64)
+    d = np.array(cg.bounds(degree_bounds), dtype=np.float64)
+    integral = m == 0 or np.issubdtype(cg.ew.dtype, np.integer)
+
+    if ub is None or not math.isfinite(ub):
+        # cualquier árbol pesa a lo sumo lo que pesan las n-1 aristas más caras
+        ub = float(np.sort(w)[::-1][:max(n - 1, 0)].sum()) + 1.0
+        ub_known = False
+    else:
+        ub_known = True
+
+    lam = np.zeros(n)
+    best = -math.inf
+    best_lam, best_tree = lam.copy(), []
+    feasible_tree = None
+    optimal = False
+    # orden de las aristas por costo penalizado; se reutiliza entre iteraciones porque
+    # los costos cambian poco y reordenar un arreglo casi ordenado es casi lineal
+    order = np.argsort(w, kind='stable')
+    eu_l, ev_l = eu.tolist(), ev.tolist()
+    no_improve = 0
+
+    it = 0
+    for it in range(1, max_iter + 1):
+        c = w + lam[eu] + lam[ev]
+        order = order[np.argsort(c[order], kind='stable')]
+        tree = _kruskal(order.tolist(), eu_l, ev_l, n)
+        if len(tree) < n - 1:
+            # G no es conexo: no existe árbol abarcador
+            return {'lower_bound': math.inf, 'upper_bound': math.inf, 'multipliers': {},
+                    'reduced_costs': {}, 'tree': cg.to_nx([]), 'feasible_tree': None,
+                    'optimal': True, 'iterations': it}
+
+        tree = np.array(tree, dtype=np.int64)
+        L = float(c[tree].sum() - lam @ d)
+        if L > best + tol:
+            best, best_lam, best_tree = L, lam.copy(), tree
+            no_improve = 0
+        else:
+            no_improve += 1
+
+        deg = np.bincount(eu[tree], minlength=n) + np.bincount(ev[tree], minlength=n)
+        g = deg - d
+        if (g <= 0).all():
+            # el árbol lagrangiano respeta los grados: es una solución factible
+            cost = float(w[tree].sum())
+            if feasible_tree is None or cost < ub:
+                feasible_tree = tree
+            if cost < ub:
+                ub, ub_known = cost, True
+            if abs(lam @ g) <= tol:
+                # holgura complementaria: el árbol es óptimo
+                best, best_lam, best_tree = max(best, L), lam.copy(), tree
+                optimal = True
+                break
+
+        gap = ub - best
+        if ub_known and gap < (1 - tol if integral else tol):
+            optimal = True
+            break
+        if no_improve >= patience:
+            theta /= 2
+            no_improve = 0
+            if theta < tol: break
+
+        # proyección: los multiplicadores en cero con subgradiente negativo no se mueven
+        g = np.where((lam <= 0) & (g < 0), 0.0, g)
+        norm = float(g @ g)
+        if norm == 0: break
+        lam = np.maximum(0.0, lam + theta * max(ub - L, tol) / norm * g)
+
+    lower = math.ceil(best - tol) if integral and math.isfinite(best) else best
+    nodes = cg.nodes
+    c = w + best_lam[eu] + best_lam[ev]
+    return {
+        'lower_bound': lower,
+        'upper_bound': ub if ub_known else math.inf,
+        'multipliers': {nodes[i]: float(best_lam[i]) for i in range(n)},
+        'reduced_costs': {(nodes[eu_l[k]], nodes[ev_l[k]]): float(c[k]) for k in range(m)},
+        'tree': cg.to_nx(best_tree.tolist() if len(best_tree) else []),
+        'feasible_tree': cg.to_nx(feasible_tree.tolist()) if feasible_tree is not None else None,
+        'optimal': optimal,
+        'iterations': it,
+    }
+
+
+def _kruskal(order, eu, ev, n):
+    '''
+    Kruskal sobre las aristas en el orden dado. Devuelve los ids de las aristas del bosque.
+    '''
+    parent = list(range(n))
+    tree = []
+    for e in order:
+        a, b = eu[e], ev[e]
+        while parent[a] != a:
+            parent[a] = parent[parent[a]]
+            a = parent[a]
+        while parent[b] != b:
+            parent[b] = parent[parent[b]]
+            b = parent[b]
+        if a == b: continue
+        parent[b] = a
+        tree.append(e)
+        if len(tree) == n - 1: break
+    return tree
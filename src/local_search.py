@@ -0,0 +1,124 @@
+'''
+Post-optimización de árboles factibles por intercambio de aristas.
+
+Las heurísticas se detienen en cuanto el árbol es factible. Aquí se parte de un árbol factible
+(de dual_method, AH_Heuristic, CH_Heuristic o kruskal_dcst) y se aplican intercambios que bajan
+el costo sin violar las restricciones de grado: agregar una arista (a,b) fuera del árbol y quitar
+la más pesada del camino a-b que se pueda quitar. Si a (o b) ya tiene el grado máximo, la arista
+que se quita tiene que ser la del camino incidente a a, para que su grado no cambie.
+
+La arista más pesada del camino se consulta en O(log n) con PathMaxIndex, así que revisar todas
+las aristas fuera del árbol cuesta O(m log n) más una reconstrucción O(n log n) por intercambio.
+
+Con tabu > 0, al llegar a un óptimo local se hace el intercambio que menos empeora el costo y se
+prohíbe deshacerlo durante tabu movimientos; se devuelve el mejor árbol visto.
+'''
+
+import math
+
+import networkx as nx
+
+from utils import get_cost
+from compact import CompactGraph
+from rooted_tree import RootedTree, PathMaxIndex
+from tree_state import TreeState
+from profiling import count, timed
+
+
+def _candidate(k, cg, state, pm):
+    '''
+    Arista del árbol que se quitaría al agregar la arista k, o -1 si agregar k viola alguna restricción.
+    '''
+    _, _, _, eu, ev, _ = cg.lists()
+    a, b = eu[k], ev[k]
+    deg, bound = state.deg, state.bound
+    free_a, free_b = deg[a] < bound[a], deg[b] < bound[b]
+    if free_a and free_b:
+        return pm.max_edge(a, b)
+    if free_b:
+        return pm.first_edge(a, b)
+    if free_a:
+        return pm.first_edge(b, a)
+    return -1
+
+
+@timed('local_search')
+def local_search(G: nx.Graph, T: nx.Graph, degree_bounds: dict, tabu: int = 0, max_stall: int = 10):
+    '''
+    Mejora un árbol abarcador factible con intercambios de aristas que respetan las restricciones de grado.
+
+    :param G: Grafo con nodos V y aristas E con pesos
+    :param T: Árbol abarcador factible de G (no se modifica)
+    :param degree_bounds: Diccionario que mapea cada vértice v a su límite máximo de grado
+    :param tabu: Cantidad de movimientos durante los que no se puede deshacer un intercambio. Con 0 solo
+                 se aplican intercambios que mejoran y la búsqueda termina en el primer óptimo local.
+    :param max_stall: Con tabu > 0, cantidad de salidas de óptimos locales seguidas sin mejorar el mejor árbol
+                      antes de terminar
+    :return: Tupla (costo, árbol). Si T no es un árbol abarcador factible se devuelve sin cambios.
+    '''
+    cg = CompactGraph.from_nx(G)
+    _, _, _, eu, ev, ew = cg.lists()
+    tree_edges = cg.tree_edges(T)
+    state = TreeState(cg, cg.bounds(degree_bounds), tree_edges)
+    if state.violators or len(T) != cg.n or not nx.is_tree(T):
+        return get_cost(T), T
+
+    rt = RootedTree(cg.n, ((eu[e], ev[e], e) for e in tree_edges))
+    in_tree = state.in_tree
+    # aristas fuera del árbol de la más barata a la más cara: las baratas son las que más probablemente mejoran
+    by_weight = cg.by_weight()
+    # tabu_until[e]: movimiento hasta el cual la arista e no puede entrar (si salió) ni salir (si entró)
+    tabu_until = [0] * cg.m
+    moves = 0
+    best_cost, best_edges = math.inf, None
+    stall = 0
+
+    def apply(e, k):
+        nonlocal moves
+        rt.swap(eu[e], ev[e], eu[k], ev[k], k)
+        state.swap(e, k)
+        moves += 1
+        if tabu:
+            tabu_until[e] = tabu_until[k] = moves + tabu
+
+    while True:
+        # descenso: intercambios que bajan el costo hasta que no quede ninguno
+        pm = PathMaxIndex(rt, ew)
+        improved = True
+        while improved:
+            improved = False
+            examined = 0
+            for k in by_weight:
+                if in_tree[k] or tabu_until[k] > moves: continue
+                examined += 1
+                e = _candidate(k, cg, state, pm)
+                if e < 0 or ew[e] <= ew[k] or tabu_until[e] > moves: continue
+                apply(e, k)
+                count('local_search.swaps')
+                pm = PathMaxIndex(rt, ew)
+                improved = True
+            count('local_search.passes')
+            count('local_search.candidates_examined', examined)
+
+        if state.cost < best_cost:
+            best_cost, best_edges = state.cost, state.edges()
+            stall = 0
+        else:
+            stall += 1
+        if not tabu or stall > max_stall:
+            break
+
+        # salida del óptimo local: el intercambio permitido que menos empeora el costo
+        escape, escape_delta = None, math.inf
+        for k in by_weight:
+            if in_tree[k] or tabu_until[k] > moves: continue
+            e = _candidate(k, cg, state, pm)
+            if e < 0 or tabu_until[e] > moves: continue
+            if ew[k] - ew[e] < escape_delta:
+                escape, escape_delta = (e, k), ew[k] - ew[e]
+        if escape is None:
+            break
+        apply(*escape)
+        count('local_search.escapes')
+
+    return best_cost, cg.to_nx(best_edges)
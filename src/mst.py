@@ -0,0 +1,204 @@
+'''
+Árbol abarcador mínimo compartido por las heurísticas.
+
+El MST (o bosque abarcador mínimo, si G no es conexo) se calcula una sola vez por grafo sobre los
+arreglos de CompactGraph y se guarda junto con esa representación compacta. Las heurísticas que
+parten del MST (dual_method, CH_Heuristic, AH_Heuristic) y la referencia del notebook lo piden aquí
+y cada una arma su propia copia como nx.Graph, sin volver a ordenar aristas ni a correr union-find.
+
+Hay dos implementaciones y se elige según la densidad:
+- Kruskal: recorre las aristas en el orden de cg.by_weight() con un union-find en listas planas.
+- Prim con heap binario: no depende del orden global de las aristas. Kruskal termina en cuanto une
+  todos los vértices, que en la práctica ocurre después de recorrer una fracción chica de las aristas,
+  así que Prim solo conviene en grafos muy densos donde alguna arista del MST es de las más pesadas
+  (Kruskal tiene que recorrer casi todo el orden).
+
+Las dos desempatan por la posición de cada arista en el orden estable por peso, es decir, igual que
+nx.minimum_spanning_edges (Kruskal sobre G.edges ordenadas de forma estable). Por eso devuelven las
+mismas aristas, en el mismo orden, que networkx, y el árbol resultante tiene los vecinos en el mismo
+orden que el de nx.minimum_spanning_tree: las heurísticas dan exactamente los mismos resultados.
+
+El caché se indexa por el objeto G (referencia débil) y cada consulta compara una huella del contenido de
+G: los vértices y las aristas con sus pesos, en el orden de G (ese orden define los ids de CompactGraph y el
+orden de los vecinos en el árbol). Así cualquier cambio en el lugar, de aristas o de pesos, invalida la
+entrada. Calcular la huella es un recorrido de las aristas, mucho más barato que ordenarlas.
+
+Uso:
+    T = minimum_spanning_tree(G)               # copia nueva, se puede modificar
+    mst = graph_mst(G); mst.cost, mst.cg       # sin construir el nx.Graph
+'''
+
+import heapq
+import weakref
+
+import networkx as nx
+
+from utils import tree_from_edges
+from compact import CompactGraph
+from profiling import count, timed
+
+# a partir de esta cantidad de aristas por vértice se usa Prim (en K_1000, con las aristas de un vértice
+# como las más pesadas, Prim tarda 0.76s y Kruskal 1.0s; con densidad 50 y pesos al azar Kruskal es 40 veces más rápido)
+PRIM_DENSITY = 128
+
+
+class MST:
+    '''
+    Bosque abarcador mínimo sobre una representación compacta.
+
+    - cg: CompactGraph sobre el que se calculó
+    - edges: ids de las aristas, en el orden en que las devuelve nx.minimum_spanning_edges
+    - cost: suma de los pesos
+    - connected: True si es un árbol abarcador (G conexo)
+    '''
+    __slots__ = ('cg', 'edges', 'cost', 'connected')
+
+    def __init__(self, cg: CompactGraph, edges: list):
+        _, _, _, _, _, ew = cg.lists()
+        self.cg = cg
+        self.edges = edges
+        self.cost = sum(ew[e] for e in edges)
+        self.connected = len(edges) == cg.n - 1 or cg.n == 0
+
+    def edge_list(self, G: nx.Graph):
+        '''
+        Aristas (u, v, datos) como las entrega nx.minimum_spanning_edges(G, data=True).
+        '''
+        _, _, _, eu, ev, _ = self.cg.lists()
+        nodes, adj = self.cg.nodes, G.adj
+        return [(nodes[eu[e]], nodes[ev[e]], adj[nodes[eu[e]]][nodes[ev[e]]]) for e in self.edges]
+
+    def tree(self, G: nx.Graph):
+        '''
+        Árbol nuevo igual al de nx.minimum_spanning_tree(G).
+        '''
+        return tree_from_edges(G, self.edge_list(G))
+
+
+def kruskal_mst(cg: CompactGraph):
+    '''
+    Kruskal sobre las aristas en el orden de cg.by_weight(), con union-find de rango y compresión por mitades.
+    Devuelve los ids de las aristas del bosque en el orden en que se agregan.
+    '''
+    _, _, _, eu, ev, _ = cg.lists()
+    uf = list(range(cg.n))
+    rank = [0] * cg.n
+    edges = []
+    missing = cg.n - 1
+    for e in cg.by_weight():
+        if missing <= 0: break
+        a, b = eu[e], ev[e]
+        while uf[a] != a:
+            uf[a] = uf[uf[a]]
+            a = uf[a]
+        while uf[b] != b:
+            uf[b] = uf[uf[b]]
+            b = uf[b]
+        if a == b: continue
+        if rank[a] < rank[b]: a, b = b, a
+        uf[b] = a
+        if rank[a] == rank[b]: rank[a] += 1
+        edges.append(e)
+        missing -= 1
+    return edges
+
+
+def prim_mst(cg: CompactGraph):
+    '''
+    Prim con heap binario desde cada vértice todavía no alcanzado (un árbol por componente).
+    Las aristas se comparan por (peso, id), que es su orden en cg.by_weight(), así que el bosque es el
+    mismo que el de kruskal_mst y no hace falta ordenar todas las aristas; se devuelve en ese mismo orden.
+    '''
+    indptr, adj, adj_edge, _, _, ew = cg.lists()
+    n = cg.n
+    in_tree = bytearray(n)
+    # mejor arista conocida (peso, id) para llegar a cada vértice fuera del árbol
+    best = [None] * n
+    chosen = []
+    push, pop = heapq.heappush, heapq.heappop
+    for s in range(n):
+        if in_tree[s]: continue
+        in_tree[s] = 1
+        heap = []
+        x = s
+        while True:
+            for p in range(indptr[x], indptr[x + 1]):
+                y = adj[p]
+                if in_tree[y]: continue
+                e = adj_edge[p]
+                key = (ew[e], e)
+                if best[y] is None or key < best[y]:
+                    best[y] = key
+                    push(heap, (key, y))
+            while heap and in_tree[heap[0][1]]:
+                pop(heap)
+            if not heap: break
+            key, x = pop(heap)
+            in_tree[x] = 1
+            chosen.append(key)
+    chosen.sort()
+    return [e for _, e in chosen]
+
+
+@timed('mst')
+def compact_mst(cg: CompactGraph, algorithm: str = None):
+    '''
+    :param algorithm: 'kruskal' o 'prim'. Por defecto se elige según la densidad (ver PRIM_DENSITY).
+    '''
+    if algorithm is None:
+        algorithm = 'prim' if cg.m >= PRIM_DENSITY * cg.n else 'kruskal'
+    count('mst.' + algorithm)
+    return MST(cg, prim_mst(cg) if algorithm == 'prim' else kruskal_mst(cg))
+
+
+# G -> (huella de G, MST)
+_cache = weakref.WeakKeyDictionary()
+
+
+def _fingerprint(G: nx.Graph):
+    '''
+    Huella de los vértices y las aristas (con pesos) de G, en su orden.
+    '''
+    return hash((tuple(G), tuple(G.edges(data='weight'))))
+
+
+def graph_mst(G: nx.Graph, cg: CompactGraph = None):
+    '''
+    MST de G, calculado una sola vez mientras G no cambie.
+
+    :param cg: representación compacta de G (opcional). Si el MST no está en caché se calcula sobre ella;
+               debe tener los vértices y las aristas en el orden de G, como CompactGraph.from_nx(G).
+    :return: MST (su atributo cg es la representación compacta usada, que se puede reutilizar)
+    '''
+    key = _fingerprint(G)
+    hit = _cache.get(G)
+    if hit is not None and hit[0] == key:
+        count('mst.cache_hits')
+        return hit[1]
+    mst = compact_mst(cg if cg is not None else CompactGraph.from_nx(G))
+    _cache[G] = (key, mst)
+    return mst
+
+
+def clear_cache(G: nx.Graph = None):
+    '''
+    Olvida el MST de G (o de todos los grafos si G es None).
+    '''
+    if G is None:
+        _cache.clear()
+    else:
+        _cache.pop(G, None)
+
+
+def minimum_spanning_edges(G: nx.Graph, cg: CompactGraph = None):
+    '''
+    Igual que list(nx.minimum_spanning_edges(G, data=True)), usando el caché.
+    '''
+    return graph_mst(G, cg).edge_list(G)
+
+
+def minimum_spanning_tree(G: nx.Graph, cg: CompactGraph = None):
+    '''
+    Igual que nx.minimum_spanning_tree(G), usando el caché. Cada llamada devuelve un árbol nuevo.
+    '''
+    return graph_mst(G, cg).tree(G)
@@ -0,0 +1,176 @@
+'''
+Portafolio de algoritmos en paralelo con un presupuesto de tiempo.
+
+Kernel+Kruskal, el método dual, CH y AH corren a la vez en procesos distintos y, cuando quedan
+procesos libres, se lanzan reinicios de CH y AH sobre el grafo con los vértices reetiquetados
+(como run_restarts del cuaderno). El mejor costo factible encontrado hasta el momento se comparte
+entre procesos en memoria compartida (multiprocessing.Value): cada corrida de CH o AH lo lee al
+empezar y lo usa como cota (ub y C_max). Al vencer el presupuesto las corridas pendientes se
+cancelan y las que están en curso se interrumpen con SIGALRM.
+
+Uso:
+    cost, T = portfolio_solve(G, degree_bounds, budget=5.0, workers=8)
+'''
+
+import math
+import multiprocessing as mp
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from itertools import count
+
+import networkx as nx
+
+from utils import get_cost, is_feasable
+from ch import CH_Heuristic
+from ah import AH_Heuristic
+from runner import ALGORITHMS, DEFAULT_ALGOS
+from timeouts import TimeLimitExceeded, time_limit
+
+# algoritmos que se reinician con otro etiquetado mientras quede tiempo
+RESTART_ALGOS = ("CH", "AH")
+
+# instancia y mejor costo compartido, inicializados una vez en cada proceso del pool
+_G = None
+_bounds = None
+_incumbent = None
+
+
+def _init_worker(G, degree_bounds, incumbent):
+    global _G, _bounds, _incumbent
+    _G, _bounds, _incumbent = G, degree_bounds, incumbent
+
+
+def _permute(G, degree_bounds, seed):
+    '''
+    Reetiqueta los vértices de G con una permutación aleatoria.
+
+    :return: (grafo permutado, restricciones permutadas, mapeo de las etiquetas nuevas a las originales)
+    '''
+    rng = random.Random(seed)
+    nodes = list(G.nodes())
+    perm = nodes[:]
+    rng.shuffle(perm)
+    mapping = dict(zip(nodes, perm))
+    G_perm = nx.relabel_nodes(G, mapping, copy=True)
+    bounds_perm = {mapping[v]: degree_bounds[v] for v in nodes}
+    return G_perm, bounds_perm, dict(zip(perm, nodes))
+
+
+def _run(algo, seed, deadline):
+    '''
+    Corre un algoritmo dentro de un proceso del pool hasta el instante deadline (time.time()).
+    Si seed no es None la instancia se reetiqueta antes.
+
+    :return: (algo, seed, costo, aristas) donde aristas es None si el árbol no es factible o no mejora
+             el mejor costo compartido. El costo es None si la corrida se interrumpió por tiempo.
+    '''
+    remaining = deadline - time.time()
+    if remaining <= 0:
+        return algo, seed, None, None
+    G, degree_bounds, back = _G, _bounds, None
+    try:
+        with time_limit(remaining):
+            if seed is not None:
+                G, degree_bounds, back = _permute(G, degree_bounds, seed)
+            incumbent = _incumbent.value
+            bound = incumbent if math.isfinite(incumbent) else None
+            if algo == "CH":
+                _, T = CH_Heuristic(G, degree_bounds, ub=bound)
+            elif algo == "AH":
+                _, T = AH_Heuristic(G, degree_bounds, C_max=bound)
+            else:
+                T, _ = ALGORITHMS[algo](G, degree_bounds)
+    except TimeLimitExceeded:
+        return algo, seed, None, None
+
+    if len(T) != len(G) or not nx.is_tree(T) or not is_feasable(degree_bounds, T):
+        return algo, seed, math.inf, None
+    cost = get_cost(T)
+    with _incumbent.get_lock():
+        if cost >= _incumbent.value:
+            # ya hay un árbol al menos igual de bueno: no hace falta enviar este
+            return algo, seed, cost, None
+        _incumbent.value = cost
+    if back is None:
+        return algo, seed, cost, list(T.edges(data='weight'))
+    return algo, seed, cost, [(back[u], back[v], w) for u, v, w in T.edges(data='weight')]
+
+
+def portfolio_solve(G: nx.Graph, degree_bounds: dict, budget: float = 10.0, workers: int = None,
+                    algos=DEFAULT_ALGOS, restart_algos=RESTART_ALGOS, max_restarts: int = None,
+                    seed: int = 0, stats: dict = None):
+    '''
+    Corre los algoritmos de algos y reinicios de restart_algos en paralelo durante a lo sumo budget segundos.
+
+    :param budget: tiempo total en segundos
+    :param workers: cantidad de procesos (por defecto, la cantidad de núcleos)
+    :param max_restarts: cantidad máxima de reinicios; si es None se reinicia hasta agotar el presupuesto
+    :param seed: semilla del primer reinicio; el reinicio i usa seed + i
+    :param stats: diccionario opcional donde se guardan las corridas completadas, las interrumpidas y
+                  qué corrida encontró el mejor árbol
+    :return: Tupla (costo, árbol) con el mejor árbol factible encontrado, o (inf, grafo sin aristas) si ninguno lo es
+    '''
+    start = time.time()
+    deadline = start + budget
+    workers = workers or os.cpu_count()
+    incumbent = mp.Value('d', math.inf)
+
+    def tasks():
+        for algo in algos:
+            yield algo, None
+        if restart_algos:
+            for i in count():
+                if max_restarts is not None and i >= max_restarts:
+                    return
+                yield restart_algos[i % len(restart_algos)], seed + i
+
+    pending = tasks()
+    best_cost, best_edges, best_run = math.inf, None, None
+    runs = timed_out = 0
+
+    def collect(fut):
+        nonlocal best_cost, best_edges, best_run, runs, timed_out
+        algo, s, cost, edges = fut.result()
+        runs += 1
+        if cost is None:
+            timed_out += 1
+        elif edges is not None and cost < best_cost:
+            best_cost, best_edges = cost, edges
+            best_run = {"algo": algo, "seed": s, "time_to_best": time.time() - start}
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                             initargs=(G, degree_bounds, incumbent)) as pool:
+        running = set()
+
+        def fill():
+            while len(running) < workers and time.time() < deadline:
+                task = next(pending, None)
+                if task is None:
+                    return
+                running.add(pool.submit(_run, *task, deadline))
+
+        fill()
+        while running:
+            done, running = wait(running, timeout=max(0.0, deadline - time.time()), return_when=FIRST_COMPLETED)
+            for fut in done:
+                collect(fut)
+            if time.time() >= deadline:
+                break
+            fill()
+        # las corridas en curso terminan con su alarma al vencer el presupuesto
+        for fut in running:
+            fut.cancel()
+    for fut in running:
+        if not fut.cancelled():
+            collect(fut)
+
+    if stats is not None:
+        stats.update({"runs": runs, "timed_out": timed_out, "elapsed": time.time() - start})
+        stats.update(best_run or {"algo": None, "seed": None, "time_to_best": None})
+
+    T = nx.Graph()
+    T.add_nodes_from(G)
+    T.add_weighted_edges_from(best_edges or [])
+    return best_cost, T
@@ -0,0 +1,123 @@
+'''
+Instrumentación opcional de los algoritmos: contadores y tiempos por fase.
+
+Los algoritmos llaman a count(...), usan phase(...) en puntos clave y se decoran con timed(...).
+Mientras no haya una recolección activa nada de esto hace trabajo (un chequeo de una variable
+global), así que puede quedar en el código. Para medir una corrida:
+
+    with collect() as prof:
+        AH_Heuristic(G, degree_bounds)
+    prof.to_dict()        # {'counters': {'ah.swaps': ..., ...}, 'timers': {'ah.mst': ..., ...}}
+    prof.to_json('perfil.json')
+
+Los ciclos internos acumulan en variables locales y llaman a count una sola vez al final.
+'''
+
+import json
+import time
+from contextlib import contextmanager, nullcontext
+from functools import wraps
+
+# recolección activa (None si la instrumentación está apagada)
+_active = None
+_NULL = nullcontext()
+
+
+class Profile:
+    '''
+    - counters: nombre -> cantidad acumulada
+    - timers: nombre de fase -> segundos acumulados
+    - calls: nombre de fase -> cantidad de veces que se entró a la fase
+    '''
+    __slots__ = ('counters', 'timers', 'calls')
+
+    def __init__(self):
+        self.counters = {}
+        self.timers = {}
+        self.calls = {}
+
+    def to_dict(self):
+        return {'counters': dict(self.counters), 'timers': dict(self.timers), 'calls': dict(self.calls)}
+
+    def to_json(self, path=None):
+        '''
+        Devuelve el perfil como JSON y, si se indica path, lo escribe en ese archivo.
+        '''
+        text = json.dumps(self.to_dict(), indent=2, sort_keys=True)
+        if path is not None:
+            with open(path, 'w') as f:
+                f.write(text)
+        return text
+
+
+class _Phase:
+    __slots__ = ('prof', 'name', 'start')
+
+    def __init__(self, prof, name):
+        self.prof = prof
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        prof, name = self.prof, self.name
+        prof.timers[name] = prof.timers.get(name, 0.0) + time.perf_counter() - self.start
+        prof.calls[name] = prof.calls.get(name, 0) + 1
+        return False
+
+
+@contextmanager
+def collect():
+    '''
+    Activa la instrumentación dentro del bloque y entrega el Profile donde se acumula.
+    Las recolecciones se pueden anidar; al salir se restaura la anterior.
+    '''
+    global _active
+    prev = _active
+    prof = Profile()
+    _active = prof
+    try:
+        yield prof
+    finally:
+        _active = prev
+
+
+def enabled():
+    return _active is not None
+
+
+def count(name, k=1):
+    '''
+    Suma k al contador name si hay una recolección activa.
+    '''
+    prof = _active
+    if prof is not None:
+        prof.counters[name] = prof.counters.get(name, 0) + k
+
+
+def phase(name):
+    '''
+    Context manager que mide el tiempo de la fase name si hay una recolección activa.
+    '''
+    prof = _active
+    if prof is None:
+        return _NULL
+    return _Phase(prof, name)
+
+
+def timed(name):
+    '''
+    Decorador que mide cada llamada a la función como la fase name.
+    '''
+    def decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            prof = _active
+            if prof is None:
+                return f(*args, **kwargs)
+            with _Phase(prof, name):
+                return f(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,157 @@
+'''
+Re-resolución a partir de un árbol anterior cuando la instancia cambia poco.
+
+Cuando cambia la restricción de grado de un vértice, o el peso de una arista, o se agregan o quitan
+aristas, no hace falta empezar otra vez desde el MST: el árbol anterior sigue siendo casi bueno.
+resolve lo repara y lo mejora localmente:
+
+1. Se quitan del árbol las aristas que ya no están en G y se reconecta con Kruskal respetando grados.
+2. Los vértices que ahora violan su restricción se reparan con los intercambios del método dual
+   (reduce_violations).
+3. Se buscan intercambios que bajen el costo solo alrededor de lo que cambió: las aristas del árbol que
+   se encarecieron buscan un reemplazo más barato en su corte (como en AH), y las aristas fuera del árbol
+   incidentes a los vértices afectados prueban entrar quitando la más pesada de su ciclo. Cada
+   intercambio agrega sus extremos a la lista de trabajo.
+
+Uso:
+    G2, bounds2 = apply_delta(G, degree_bounds, delta)
+    cost, T2, changed = resolve(G2, bounds2, T, delta)
+
+donde delta es un diccionario con cualquiera de las claves
+    'bounds': {v: nueva restricción}
+    'weights': {(u, v): nuevo peso}
+    'added': [(u, v, peso), ...]
+    'removed': [(u, v), ...]
+'''
+
+from collections import deque
+
+import networkx as nx
+
+from utils import get_cost
+from compact import CompactGraph
+from rooted_tree import RootedTree
+from tree_state import TreeState
+from kernelization import kruskal_dcst_compact
+from heuristics import reduce_violations
+from profiling import count, timed
+
+
+def apply_delta(G: nx.Graph, degree_bounds: dict, delta: dict):
+    '''
+    Devuelve copias de G y degree_bounds con los cambios de delta aplicados.
+    '''
+    G = G.copy()
+    degree_bounds = dict(degree_bounds)
+    degree_bounds.update(delta.get('bounds', {}))
+    G.remove_edges_from(delta.get('removed', ()))
+    for (u, v), w in delta.get('weights', {}).items():
+        G[u][v]['weight'] = w
+    G.add_weighted_edges_from(delta.get('added', ()))
+    return G, degree_bounds
+
+
+@timed('resolve')
+def resolve(G: nx.Graph, degree_bounds: dict, T: nx.Graph, delta: dict):
+    '''
+    Repara y mejora el árbol T de la instancia anterior para la instancia actual.
+
+    :param G: grafo con los cambios de delta ya aplicados (ver apply_delta)
+    :param degree_bounds: restricciones de grado con los cambios ya aplicados
+    :param T: árbol factible de la instancia anterior (no se modifica)
+    :param delta: cambios respecto de la instancia anterior (ver el comienzo del módulo)
+    :return: Tupla (costo, árbol, aristas que entraron o salieron del árbol). Si no se pueden reparar
+             todas las violaciones el árbol devuelto no es factible.
+    '''
+    cg = CompactGraph.from_nx(G)
+    indptr, _, adj_edge, eu, ev, ew = cg.lists()
+    index, nodes = cg.index, cg.nodes
+    bound = cg.bounds(degree_bounds)
+
+    def edge_of(u, v):
+        return cg.edge_id(index[u], index[v]) if u in index and v in index else -1
+
+    # 1. aristas de T que siguen en G (con su peso anterior) y reconexión de lo que quedó separado
+    previous = {}
+    lost = []
+    for u, v, w in T.edges(data='weight'):
+        e = edge_of(u, v)
+        if e < 0:
+            lost.append((u, v))
+        else:
+            previous[e] = w
+    kept = list(previous)
+    missing = cg.n - 1 - len(kept)
+    added = kruskal_dcst_compact(cg, bound, ((eu[e], ev[e]) for e in kept), missing) if missing > 0 else []
+    count('resolve.reconnected', len(added))
+
+    state = TreeState(cg, bound, kept + added)
+    rt = RootedTree(cg.n, ((eu[e], ev[e], e) for e in kept + added))
+    deg, in_tree = state.deg, state.in_tree
+
+    # 2. violaciones nuevas
+    swaps = reduce_violations(cg, rt, state)
+
+    # vértices alrededor de los cambios
+    touched = set()
+    for v in delta.get('bounds', {}):
+        if v in index: touched.add(index[v])
+    for edge in list(delta.get('weights', {})) + list(delta.get('added', ())) + list(delta.get('removed', ())):
+        touched.update(index[x] for x in edge[:2] if x in index)
+    for e in added:
+        touched.update((eu[e], ev[e]))
+    for e, k in swaps:
+        touched.update((eu[e], ev[e], eu[k], ev[k]))
+
+    # 3. mejora local (solo si el árbol es abarcador: los caminos del árbol están definidos)
+    if state.size == cg.n - 1:
+        queue = deque(sorted(touched))
+        queued = set(touched)
+
+        def swap(e, k):
+            state.swap(e, k)
+            rt.swap(eu[e], ev[e], eu[k], ev[k], k)
+            count('resolve.swaps')
+            for x in (eu[e], ev[e], eu[k], ev[k]):
+                if x not in queued:
+                    queued.add(x)
+                    queue.append(x)
+
+        # aristas del árbol que se encarecieron: el reemplazo más barato de su corte que respete grados
+        for e in kept:
+            if not in_tree[e] or ew[e] <= previous[e]: continue
+            u, v = eu[e], ev[e]
+            for k in rt.crossing_edges(rt.child(u, v), cg):
+                if ew[k] >= ew[e]: break
+                if all(deg[z] - (z == u or z == v) + 1 <= bound[z] for z in (eu[k], ev[k])):
+                    swap(e, k)
+                    break
+
+        # aristas fuera del árbol incidentes a vértices afectados: entran si la más pesada de su ciclo
+        # que se puede quitar (sin violar grados) es más cara
+        examined = 0
+        while queue:
+            x = queue.popleft()
+            queued.discard(x)
+            for k in sorted((adj_edge[p] for p in range(indptr[x], indptr[x + 1])), key=ew.__getitem__):
+                if in_tree[k]: continue
+                examined += 1
+                a, b = eu[k], ev[k]
+                free_a, free_b = deg[a] < bound[a], deg[b] < bound[b]
+                if not free_a and not free_b: continue
+                best = -1
+                for e in rt.path_edges(a, b):
+                    # si un extremo está en su cota, la arista que sale tiene que ser incidente a él
+                    if not free_a and a != eu[e] and a != ev[e]: continue
+                    if not free_b and b != eu[e] and b != ev[e]: continue
+                    if best < 0 or ew[e] > ew[best]: best = e
+                if best >= 0 and ew[best] > ew[k]:
+                    swap(best, k)
+        count('resolve.candidates_examined', examined)
+
+    final = [e for x in range(cg.n) for y, e in rt.adj[x].items() if x < y]
+    changed = set(lost)
+    changed.update((nodes[eu[e]], nodes[ev[e]]) for e in kept if not in_tree[e])
+    changed.update((nodes[eu[e]], nodes[ev[e]]) for e in final if e not in previous)
+    T_new = cg.to_nx(final)
+    return get_cost(T_new), T_new, changed
@@ -0,0 +1,120 @@
+'''
+Robustez de un árbol ante la caída de cada enlace.
+
+Para cada arista e del árbol, link_failures busca la arista más barata de G que reconecta las dos
+partes cuando e se cae sin violar las restricciones de grado (al caer e sus extremos pierden un
+grado, así que pueden recibir la arista nueva aunque estuvieran en su cota). Todas las aristas del
+árbol se resuelven en una sola pasada en lugar de revisar el corte de cada una:
+
+- Las aristas fuera del árbol se recorren de la más barata a la más cara. Si sus dos extremos tienen
+  grado libre, reemplazan a cualquier arista de su camino en el árbol: se asignan a las aristas del
+  camino que todavía no tienen reemplazo. Un union-find sobre los vértices (cada vértice apunta a su
+  padre cuando la arista hacia el padre ya está cubierta) salta las aristas cubiertas, así que cada
+  arista del árbol se cubre una sola vez.
+- Si un extremo a está en su cota, la arista solo puede reemplazar a la arista del camino incidente
+  a a (la que le devuelve el grado). Si ambos extremos están en su cota no reemplaza a ninguna.
+
+Costo O(m log n) más el ordenamiento por peso (ya cacheado en CompactGraph).
+
+Uso:
+    table = link_failures(G, T, degree_bounds)
+    table[i]   # {'edge', 'weight', 'replacement', 'replacement_weight', 'delta'}
+'''
+
+import math
+
+import networkx as nx
+
+from compact import CompactGraph
+from rooted_tree import RootedTree, PathMaxIndex
+from tree_state import TreeState
+from profiling import count, timed
+
+
+@timed('link_failures')
+def link_failures(G: nx.Graph, T: nx.Graph, degree_bounds: dict, cg: CompactGraph = None):
+    '''
+    Mejor reconexión factible para la caída de cada arista del árbol.
+
+    :param G: Grafo con nodos V y aristas E con pesos
+    :param T: Árbol (o bosque) de G
+    :param degree_bounds: Diccionario que mapea cada vértice v a su límite máximo de grado
+    :param cg: Representación compacta de G (opcional)
+    :return: lista de registros, uno por arista de T en el orden de T.edges:
+             - edge, weight: la arista que se cae y su peso
+             - replacement, replacement_weight: arista más barata que reconecta respetando grados
+               (None si no hay ninguna: la caída deja la red partida)
+             - delta: aumento del costo del árbol al reemplazarla (inf si no hay reemplazo)
+    '''
+    if cg is None:
+        cg = CompactGraph.from_nx(G)
+    _, _, _, eu, ev, ew = cg.lists()
+    nodes = cg.nodes
+    tree_edges = cg.tree_edges(T)
+    state = TreeState(cg, cg.bounds(degree_bounds), tree_edges)
+    deg, bound, in_tree = state.deg, state.bound, state.in_tree
+    rt = RootedTree(cg.n, ((eu[e], ev[e], e) for e in tree_edges))
+    parent, parent_edge, depth = rt.parent, rt.parent_edge, rt.depth
+    pm = None
+
+    # raíz de la componente de cada vértice (el preorden visita a los padres antes que a los hijos)
+    _, _, order = rt.euler()
+    top = list(range(cg.n))
+    for x in order:
+        if parent[x] >= 0: top[x] = top[parent[x]]
+
+    # jump[x] == x si la arista de x a su padre todavía no tiene reemplazo
+    jump = list(range(cg.n))
+
+    def find(x):
+        root = x
+        while jump[root] != root: root = jump[root]
+        while jump[x] != root: jump[x], x = root, jump[x]
+        return root
+
+    # replacement[e]: mejor arista de reemplazo de la arista del árbol e (-1 si no hay). Como las aristas
+    # se recorren por peso, la primera que se asigna es la mejor
+    replacement = [-1] * cg.m
+    pending = len(tree_edges)
+    covered = examined = 0
+    for k in cg.by_weight():
+        if not pending: break
+        if in_tree[k]: continue
+        a, b = eu[k], ev[k]
+        if top[a] != top[b]: continue
+        free_a, free_b = bound[a] - deg[a], bound[b] - deg[b]
+        if free_a < 0 or free_b < 0: continue
+        examined += 1
+        if free_a and free_b:
+            # todas las aristas del camino a-b sin reemplazo todavía
+            a, b = find(a), find(b)
+            while a != b:
+                if depth[a] < depth[b]: a, b = b, a
+                e = parent_edge[a]
+                if replacement[e] < 0:
+                    replacement[e] = k
+                    pending -= 1
+                covered += 1
+                jump[a] = parent[a]
+                a = find(a)
+        elif free_a or free_b:
+            # solo la arista del camino incidente al extremo que está en su cota
+            if pm is None: pm = PathMaxIndex(rt, ew)
+            e = pm.first_edge(a, b) if not free_a else pm.first_edge(b, a)
+            if replacement[e] < 0:
+                replacement[e] = k
+                pending -= 1
+    count('link_failures.candidates_examined', examined)
+    count('link_failures.path_edges_covered', covered)
+
+    table = []
+    for e in tree_edges:
+        k = replacement[e]
+        table.append({
+            "edge": (nodes[eu[e]], nodes[ev[e]]),
+            "weight": ew[e],
+            "replacement": (nodes[eu[k]], nodes[ev[k]]) if k >= 0 else None,
+            "replacement_weight": ew[k] if k >= 0 else None,
+            "delta": ew[k] - ew[e] if k >= 0 else math.inf,
+        })
+    return table
@@ -0,0 +1,428 @@
+'''
+Árbol enraizado con intervalos de Euler para las heurísticas de intercambio.
+
+Las heurísticas preguntan muchas veces "al quitar la arista (i,j), ¿de qué lado queda x?".
+Con el árbol enraizado la arista (i,j) separa el subárbol del hijo del resto, y con los tiempos
+de entrada/salida del recorrido de Euler la pregunta es una comparación de enteros.
+'''
+
+import numpy as np
+from profiling import count
+
+
+class RootedTree:
+    '''
+    Árbol (o bosque) enraizado sobre los vértices 0..n-1 de un CompactGraph.
+
+    - adj: adj[x] = {y: id de la arista (x,y)}
+    - parent, parent_edge, depth: padre, arista al padre y profundidad (padre -1 en las raíces)
+    - tin, tout, order: recorrido de Euler. y está en el subárbol de x si tin[x] <= tin[y] < tout[x],
+      y order[tin[x]:tout[x]] son los vértices del subárbol de x.
+
+    swap() actualiza padres y profundidades solo en la parte del árbol que se mueve. Si los intervalos
+    de Euler están vigentes también los actualiza moviendo el bloque del subárbol (ver _move_block);
+    si no, se recalculan en la siguiente consulta que los necesite.
+    '''
+    __slots__ = ('n', 'adj', 'roots', 'parent', 'parent_edge', 'depth', 'tin', 'tout', 'order', '_euler_ok')
+
+    def __init__(self, n, edges, roots=()):
+        '''
+        :param n: cantidad de vértices
+        :param edges: iterable de (u, v, id de arista)
+        :param roots: raíces preferidas. Las componentes sin raíz indicada se enraízan en su menor vértice.
+        '''
+        self.n = n
+        self.adj = [dict() for _ in range(n)]
+        for u, v, e in edges:
+            self.adj[u][v] = e
+            self.adj[v][u] = e
+        self.parent = [-1] * n
+        self.parent_edge = [-1] * n
+        self.depth = [0] * n
+        self.tin = [0] * n
+        self.tout = [0] * n
+        self.order = []
+        self.roots = []
+        seen = [False] * n
+        for r in list(roots) + list(range(n)):
+            if seen[r]: continue
+            self.roots.append(r)
+            seen[r] = True
+            stack = [r]
+            while stack:
+                x = stack.pop()
+                for y, e in self.adj[x].items():
+                    if seen[y]: continue
+                    seen[y] = True
+                    self.parent[y] = x
+                    self.parent_edge[y] = e
+                    self.depth[y] = self.depth[x] + 1
+                    stack.append(y)
+        self._euler()
+
+    def _euler(self):
+        # preorden iterativo siguiendo los punteros a padre; el subárbol de x ocupa size[x] posiciones desde tin[x]
+        count('rooted_tree.euler_rebuilds')
+        parent, tin, tout = self.parent, self.tin, self.tout
+        children = [[] for _ in range(self.n)]
+        for y in range(self.n):
+            if parent[y] >= 0: children[parent[y]].append(y)
+        order = []
+        for r in self.roots:
+            stack = [r]
+            while stack:
+                x = stack.pop()
+                order.append(x)
+                stack.extend(children[x])
+        size = [1] * self.n
+        for x in reversed(order):
+            if parent[x] >= 0: size[parent[x]] += size[x]
+        for i, x in enumerate(order):
+            tin[x] = i
+            tout[x] = i + size[x]
+        self.order = order
+        self._euler_ok = True
+
+    def euler(self):
+        '''
+        Devuelve (tin, tout, order) actualizados.
+        '''
+        if not self._euler_ok: self._euler()
+        return self.tin, self.tout, self.order
+
+    def in_subtree(self, x, y):
+        '''
+        True si y está en el subárbol de x.
+        '''
+        if not self._euler_ok: self._euler()
+        return self.tin[x] <= self.tin[y] < self.tout[x]
+
+    def child(self, u, v):
+        '''
+        Devuelve el extremo hijo de la arista del árbol (u,v).
+        '''
+        return v if self.parent[v] == u else u
+
+    def path_to_root(self, x):
+        '''
+        Vértices del camino desde x hasta la raíz de su componente, subiendo por los padres.
+        '''
+        parent = self.parent
+        path = [x]
+        while parent[x] >= 0:
+            x = parent[x]
+            path.append(x)
+        return path
+
+    def path_edges(self, x, y):
+        '''
+        Ids de las aristas del camino entre x e y (subiendo por los padres, O(largo del camino)).
+        '''
+        parent, parent_edge, depth = self.parent, self.parent_edge, self.depth
+        edges = []
+        while depth[x] > depth[y]:
+            edges.append(parent_edge[x])
+            x = parent[x]
+        while depth[y] > depth[x]:
+            edges.append(parent_edge[y])
+            y = parent[y]
+        while x != y:
+            edges.append(parent_edge[x])
+            edges.append(parent_edge[y])
+            x, y = parent[x], parent[y]
+        return edges
+
+    def crossing_edges(self, c, cg):
+        '''
+        Aristas de cg (sin contar la arista al padre de c) con exactamente un extremo en el subárbol de c,
+        ordenadas por peso. Se recorre la adyacencia del lado más pequeño del corte.
+        '''
+        indptr, adj, adj_edge, _, _, ew = cg.lists()
+        tin, tout, order = self.euler()
+        lo, hi = tin[c], tout[c]
+        if 2 * (hi - lo) <= len(order):
+            side, inside = order[lo:hi], True
+        else:
+            side, inside = order[:lo] + order[hi:], False
+        skip = self.parent_edge[c]
+        found = []
+        for x in side:
+            for k in range(indptr[x], indptr[x + 1]):
+                y = adj[k]
+                if (lo <= tin[y] < hi) != inside and adj_edge[k] != skip:
+                    found.append(adj_edge[k])
+        found.sort(key=ew.__getitem__)
+        return found
+
+    def swap(self, u, v, x, y, e):
+        '''
+        Quita la arista del árbol (u,v) y agrega (x,y) con id e, que debe reconectar las dos partes.
+        El subárbol que quedó suelto se vuelve a colgar del extremo de (x,y) que está fuera de él.
+        '''
+        parent, parent_edge, depth, adj = self.parent, self.parent_edge, self.depth, self.adj
+        c = self.child(u, v)
+        inner, outer = (x, y) if self.is_ancestor(c, x) else (y, x)
+        p = parent[c]
+        del adj[u][v]
+        del adj[v][u]
+        adj[x][y] = e
+        adj[y][x] = e
+
+        # invertimos los padres en el camino inner -> c
+        prev, prev_edge = outer, e
+        node = inner
+        while True:
+            nxt, nxt_edge = parent[node], parent_edge[node]
+            parent[node], parent_edge[node] = prev, prev_edge
+            if node == c: break
+            prev, prev_edge = node, nxt_edge
+            node = nxt
+
+        # recalculamos profundidades solo en la parte movida
+        depth[inner] = depth[outer] + 1
+        stack = [inner]
+        while stack:
+            a = stack.pop()
+            for b in adj[a]:
+                if parent[b] == a:
+                    depth[b] = depth[a] + 1
+                    stack.append(b)
+        if self._euler_ok:
+            self._move_block(c, p, inner, outer)
+
+    def _move_block(self, c, p, inner, outer):
+        '''
+        Actualiza el recorrido de Euler después de swap sin recorrer todo el árbol. El subárbol de c ocupaba
+        order[tin[c]:tout[c]]; ahora cuelga de outer enraizado en inner. Se saca ese bloque, se arma su nuevo
+        preorden y se inserta entre los hijos de outer, y solo se renumeran las posiciones que se corrieron.
+        El resultado es el mismo que el de _euler (hijos en orden decreciente de índice).
+        '''
+        count('rooted_tree.euler_moves')
+        parent, adj, tin, tout, order = self.parent, self.adj, self.tin, self.tout, self.order
+        lo, hi = tin[c], tout[c]
+        s = hi - lo
+        # el padre anterior y sus ancestros pierden s vértices; outer y los suyos los ganan
+        size = {}
+        x = p
+        while x >= 0:
+            size[x] = tout[x] - tin[x] - s
+            x = parent[x]
+        x = outer
+        while x >= 0:
+            size[x] = size.get(x, tout[x] - tin[x]) + s
+            x = parent[x]
+
+        # nuevo preorden del bloque, con los tamaños de sus vértices
+        block = []
+        stack = [inner]
+        while stack:
+            a = stack.pop()
+            block.append(a)
+            stack.extend(sorted(b for b in adj[a] if parent[b] == a))
+        for a in reversed(block):
+            size[a] = 1 + sum(size[b] for b in adj[a] if parent[b] == a)
+
+        # los hijos de outer se visitan en orden decreciente: el bloque va después de los de índice mayor
+        rest = order[:lo] + order[hi:]
+        q = tin[outer] - (s if tin[outer] >= hi else 0) + 1
+        for b in adj[outer]:
+            if parent[b] == outer and b > inner:
+                q += size[b] if b in size else tout[b] - tin[b]
+        self.order = order = rest[:q] + block + rest[q:]
+
+        a, b = min(lo, q), max(hi, q + s)
+        for i in range(a, b):
+            z = order[i]
+            if z not in size: tout[z] = i + tout[z] - tin[z]
+            tin[z] = i
+        for z, sz in size.items():
+            tout[z] = tin[z] + sz
+
+    def is_ancestor(self, c, x):
+        '''
+        True si x está en el subárbol de c. Con los intervalos de Euler vigentes es O(1);
+        si están desactualizados se sube por los padres desde x sin reconstruirlos.
+        '''
+        if self._euler_ok:
+            return self.tin[c] <= self.tin[x] < self.tout[c]
+        depth, parent = self.depth, self.parent
+        while depth[x] > depth[c]:
+            x = parent[x]
+        return x == c
+
+
+class ReplacementIndex:
+    '''
+    Índice de reemplazos para un árbol abarcador de un CompactGraph.
+
+    Guarda las aristas del grafo ordenadas por peso, marcadas según estén o no en el árbol,
+    junto con el RootedTree del árbol actual. Al quitar una arista (u,v) del árbol, las aristas
+    que reconectan las dos partes son las que tienen exactamente un extremo en el subárbol del hijo,
+    así que la más barata es la primera de la lista que no está en el árbol y pasa esa prueba.
+    Si uno de los lados es muy pequeño se recorre directamente su adyacencia.
+    Un intercambio solo cambia dos marcas y cuelga de nuevo la parte movida del árbol.
+
+    Costo por consulta: el recorrido por peso se corta en la primera arista aceptada, pero en el peor caso
+    (ninguna candidata aceptada, o todas las baratas rechazadas por accept) revisa las m aristas, O(m).
+    Con el lado pequeño es O(suma de sus grados · log). No se usa una estructura sublineal (PathMaxIndex
+    o un barrido como link_failures) porque accept depende de los grados del árbol en cada momento.
+    En las instancias ralas del benchmark cada consulta revisa unas 20 candidatas; lo que crece con n es
+    el trabajo de cada intercambio sobre el árbol (ver RootedTree.swap).
+    '''
+    __slots__ = ('cg', 'tree', 'in_tree', 'by_weight')
+
+    def __init__(self, cg, tree_edges, roots=()):
+        '''
+        :param cg: CompactGraph del grafo
+        :param tree_edges: ids de las aristas del árbol
+        :param roots: raíces preferidas del árbol
+        '''
+        _, _, _, eu, ev, _ = cg.lists()
+        tree_edges = list(tree_edges)
+        self.cg = cg
+        self.tree = RootedTree(cg.n, ((eu[e], ev[e], e) for e in tree_edges), roots)
+        self.in_tree = bytearray(cg.m)
+        for e in tree_edges:
+            self.in_tree[e] = 1
+        self.by_weight = cg.by_weight()
+
+    def _candidates(self, u, v):
+        '''
+        Aristas fuera del árbol que reconectan el árbol al quitar (u,v), de la más barata a la más cara.
+        '''
+        _, _, _, eu, ev, _ = self.cg.lists()
+        in_tree = self.in_tree
+        c = self.tree.child(u, v)
+        tin, tout, order = self.tree.euler()
+        lo, hi = tin[c], tout[c]
+        if 8 * min(hi - lo, len(order) - hi + lo) <= len(order):
+            # corte desbalanceado: es más barato recorrer la adyacencia del lado pequeño
+            yield from self.tree.crossing_edges(c, self.cg)
+            return
+        for k in self.by_weight:
+            if in_tree[k]: continue
+            if (lo <= tin[eu[k]] < hi) == (lo <= tin[ev[k]] < hi): continue
+            yield k
+
+    def best(self, u, v, accept=None):
+        '''
+        Devuelve la arista fuera del árbol más barata que reconecta el árbol al quitar (u,v)
+        y que acepta accept(k), o None si no hay ninguna.
+        '''
+        for k in self._candidates(u, v):
+            if accept is None or accept(k):
+                return k
+        return None
+
+    def cheapest(self, u, v, accept=None):
+        '''
+        Como best, pero devuelve todas las aristas aceptadas del peso mínimo (lista vacía si no hay ninguna),
+        para que quien llama pueda desempatar.
+        '''
+        ew = self.cg.lists()[5]
+        found = []
+        for k in self._candidates(u, v):
+            if found and ew[k] != ew[found[0]]: break
+            if accept is None or accept(k):
+                found.append(k)
+        return found
+
+    def swap(self, u, v, k):
+        '''
+        Quita la arista del árbol (u,v) y agrega la arista k.
+        '''
+        _, _, _, eu, ev, _ = self.cg.lists()
+        e = self.tree.adj[u][v]
+        self.tree.swap(u, v, eu[k], ev[k], k)
+        self.in_tree[e] = 0
+        self.in_tree[k] = 1
+
+
+class PathMaxIndex:
+    '''
+    Ancestros por saltos de potencias de 2 sobre un RootedTree, con la arista más pesada de cada salto.
+
+    - up[j][x]: ancestro de x 2^j niveles más arriba (la raíz si no existe)
+    - best[j][x]: id de la arista más pesada entre x y up[j][x] (-1 si no hay aristas)
+
+    Se construye en O(n log n) y responde lca y la arista más pesada de un camino en O(log n).
+    Es una foto del árbol: después de un intercambio hay que construirla de nuevo.
+    '''
+    __slots__ = ('tree', 'w', 'up', 'best')
+
+    def __init__(self, tree, weights):
+        '''
+        :param tree: RootedTree
+        :param weights: pesos de las aristas indexados por id
+        '''
+        n = tree.n
+        self.tree = tree
+        # w[-1] = -inf para que el id -1 (sin arista) nunca sea el más pesado
+        w = np.append(np.asarray(weights, dtype=float), -np.inf)
+        self.w = w.tolist()
+        parent = np.asarray(tree.parent, dtype=np.int64)
+        up = np.where(parent >= 0, parent, np.arange(n))
+        best = np.asarray(tree.parent_edge, dtype=np.int64)
+        levels = max(1, max(tree.depth, default=0).bit_length())
+        self.up, self.best = [up.tolist()], [best.tolist()]
+        for _ in range(1, levels):
+            upper = best[up]
+            best = np.where(w[best] >= w[upper], best, upper)
+            up = up[up]
+            self.up.append(up.tolist())
+            self.best.append(best.tolist())
+
+    def ancestor(self, x, d):
+        '''
+        Ancestro de x con profundidad d (d <= depth[x]).
+        '''
+        diff, j = self.tree.depth[x] - d, 0
+        while diff:
+            if diff & 1: x = self.up[j][x]
+            diff >>= 1
+            j += 1
+        return x
+
+    def lca(self, x, y):
+        depth, up = self.tree.depth, self.up
+        if depth[x] < depth[y]: x, y = y, x
+        x = self.ancestor(x, depth[y])
+        if x == y: return x
+        for j in range(len(up) - 1, -1, -1):
+            if up[j][x] != up[j][y]:
+                x, y = up[j][x], up[j][y]
+        return self.tree.parent[x]
+
+    def max_edge(self, x, y):
+        '''
+        Id de la arista más pesada del camino entre x e y (-1 si x == y).
+        '''
+        depth, up, best, w = self.tree.depth, self.up, self.best, self.w
+        found = -1
+        if depth[x] < depth[y]: x, y = y, x
+        diff, j = depth[x] - depth[y], 0
+        while diff:
+            if diff & 1:
+                if w[best[j][x]] > w[found]: found = best[j][x]
+                x = up[j][x]
+            diff >>= 1
+            j += 1
+        if x == y: return found
+        for j in range(len(up) - 1, -1, -1):
+            if up[j][x] != up[j][y]:
+                if w[best[j][x]] > w[found]: found = best[j][x]
+                if w[best[j][y]] > w[found]: found = best[j][y]
+                x, y = up[j][x], up[j][y]
+        for e in (best[0][x], best[0][y]):
+            if w[e] > w[found]: found = e
+        return found
+
+    def first_edge(self, x, y):
+        '''
+        Id de la arista del camino de x a y que es incidente a x (x != y).
+        '''
+        tree = self.tree
+        if tree.depth[y] > tree.depth[x]:
+            c = self.ancestor(y, tree.depth[x] + 1)
+            if tree.parent[c] == x: return tree.parent_edge[c]
+        return tree.parent_edge[x]
@@ -0,0 +1,291 @@
+'''
+Ejecución en paralelo de los experimentos del cuaderno.
+
+Cada trabajo es un par (instancia, algoritmo). Las instancias se identifican por (n, semilla, edge_prob,
+violation_prob) y cada proceso las regenera con generate_instance, o por la ruta de un archivo de instance_io
+que cada proceso abre con memmap. Así no hay que enviar grafos entre procesos.
+Los registros tienen el mismo formato que evaluate_algorithms/run_batch del cuaderno y se escriben en un
+archivo JSONL a medida que se completan todas las corridas de una instancia.
+Las instancias que screening.screen_instance declara infactibles con certeza no se resuelven: sus registros
+llevan el motivo en 'screened'.
+
+Uso:
+    python runner.py --sizes 10 20 30 --seeds 30 --edge-prob 0.2 0.4 0.6 --violation-prob 0.2 0.4 0.6 \
+                     --workers 8 --time-limit 60 --out resultados.jsonl
+    python runner.py --instances grande.bin --workers 4 --out resultados.jsonl
+'''
+
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import networkx as nx
+
+from utils import get_cost, is_feasable
+from instance_generator import generate_instance
+from instance_io import read_instance, to_nx
+from kernelization import reduction_dcmst, kruskal_dcst
+from heuristics import dual_method
+from mst import graph_mst
+from ch import CH_Heuristic
+from ah import AH_Heuristic
+from bruteforce import bruteforce, subset_dp, prefer_subset_dp
+from lagrangian import lagrangian_bound
+from screening import screen_instance, INFEASIBLE
+from timeouts import TimeLimitExceeded, time_limit
+
+
+# region Algoritmos
+# Cada algoritmo recibe (G, degree_bounds) y devuelve (árbol, costo reportado o None)
+def run_kernel(G, degree_bounds):
+    G_red, T_star = reduction_dcmst(G, degree_bounds)
+    return kruskal_dcst(G_red, T_star, degree_bounds), None
+
+def run_dual(G, degree_bounds):
+    mst = graph_mst(G)
+    return dual_method(G, mst.tree(G), degree_bounds, cg=mst.cg), None
+
+def run_ch(G, degree_bounds):
+    cost, T = CH_Heuristic(G, degree_bounds)
+    return T, cost
+
+def run_ah(G, degree_bounds):
+    cost, T = AH_Heuristic(G, degree_bounds, C_max=None)
+    return T, cost
+
+def run_bruteforce(G, degree_bounds):
+    _, T = bruteforce(G, degree_bounds)
+    return T, None
+
+def run_subset_dp(G, degree_bounds):
+    _, T = subset_dp(G, degree_bounds)
+    return T, None
+
+ALGORITHMS = {
+    "Kernel+Kruskal": run_kernel,
+    "Dual method": run_dual,
+    "CH": run_ch,
+    "AH": run_ah,
+    "Bruteforce": run_bruteforce,
+    "Subset DP": run_subset_dp,
+}
+DEFAULT_ALGOS = ["Kernel+Kruskal", "Dual method", "CH", "AH"]
+# trabajo adicional por instancia que calcula la cota inferior lagrangiana
+LOWER_BOUND = "__lower_bound__"
+
+
+def build_instance(n, seed, edge_prob=0.4, violation_prob=0.4):
+    edges, degree_bounds = generate_instance(n, edge_prob=edge_prob, violation_prob=violation_prob, seed=seed)
+    G = nx.Graph()
+    G.add_weighted_edges_from(edges)
+    return G, degree_bounds
+
+
+def load_instance(job):
+    if job.get("path"):
+        return to_nx(*read_instance(job["path"]))
+    return build_instance(job["n"], job["seed"], job["edge_prob"], job["violation_prob"])
+
+
+def instance_key(job):
+    return (job.get("path"), job["n"], job["seed"], job["edge_prob"], job["violation_prob"])
+
+
+def exact_solver(G, brute_force_edge_limit):
+    '''
+    Algoritmo exacto para la fila "Bruteforce", como en el cuaderno: la DP sobre subconjuntos de vértices
+    cuando 2^n es mucho menor que 2^m (grafos chicos y densos), bruteforce si hay pocas aristas y None si
+    ninguno es viable.
+    '''
+    n, m = len(G), len(G.edges)
+    if prefer_subset_dp(n, m):
+        return "Subset DP"
+    if m <= brute_force_edge_limit:
+        return "Bruteforce"
+    return None
+
+
+def run_job(job):
+    '''
+    Ejecuta un algoritmo sobre una instancia dentro de un proceso del pool.
+
+    :param job: diccionario con n, seed, edge_prob, violation_prob (o path), algo, time_limit y brute_force_edge_limit
+    :return: (job, registro) o (job, None) si el algoritmo no corresponde para la instancia
+    '''
+    G, degree_bounds = load_instance(job)
+    algo = job["algo"]
+    # la fila "Bruteforce" usa el algoritmo exacto que convenga; el registro indica cuál en exact_solver
+    solver = algo
+    if algo == "Bruteforce":
+        solver = exact_solver(G, job["brute_force_edge_limit"])
+        if solver is None:
+            return job, None
+    # las instancias infactibles con certeza no se resuelven (ver screening.py)
+    status, reason = screen_instance(G, degree_bounds)
+    if status == INFEASIBLE:
+        if algo == LOWER_BOUND:
+            return job, {"lower_bound": math.inf, "m": len(G.edges)}
+        return job, {"algo": algo, "feasible": False, "cost": math.inf, "time": 0.0, "edges_in_tree": 0,
+                     "screened": reason, "n": len(G), "m": len(G.edges)}
+
+    start = time.perf_counter()
+    try:
+        with time_limit(job["time_limit"]):
+            if algo == LOWER_BOUND:
+                return job, {"lower_bound": lagrangian_bound(G, degree_bounds)["lower_bound"], "m": len(G.edges)}
+            T, reported = ALGORITHMS[solver](G, degree_bounds)
+            elapsed = time.perf_counter() - start
+    except TimeLimitExceeded:
+        return job, {"algo": algo, "feasible": False, "cost": math.inf, "time": time.perf_counter() - start,
+                     "edges_in_tree": 0, "timed_out": True, "n": len(G), "m": len(G.edges)}
+
+    feasible = nx.is_tree(T) and is_feasable(degree_bounds, T)
+    record = {
+        "algo": algo,
+        "feasible": feasible,
+        "cost": float(get_cost(T) if feasible else math.inf),
+        "time": elapsed,
+        "edges_in_tree": len(T.edges),
+        "n": len(G),
+        "m": len(G.edges),
+    }
+    if reported is not None:
+        record["reported_cost"] = reported
+    if algo == "Bruteforce":
+        record["exact_solver"] = solver
+    return job, record
+
+
+def finish_instance(records, lower_bound=None):
+    '''
+    Completa los campos que dependen de todas las corridas de una instancia (igual que evaluate_algorithms).
+    '''
+    feasible_costs = [r["cost"] for r in records if r["feasible"]]
+    best_cost = min(feasible_costs) if feasible_costs else math.inf
+    for r in records:
+        r["best_cost"] = best_cost
+        if math.isfinite(best_cost) and r["feasible"]:
+            r["gap_vs_best"] = (r["cost"] - best_cost) / best_cost * 100
+        else:
+            r["gap_vs_best"] = None
+        if lower_bound is not None:
+            r["lower_bound"] = lower_bound
+            if r["feasible"] and lower_bound > 0:
+                r["gap_vs_lb"] = (r["cost"] - lower_bound) / lower_bound * 100
+            else:
+                r["gap_vs_lb"] = None
+    return records
+
+
+def make_jobs(sizes, seeds_per_size=3, edge_probs=(0.4,), violation_probs=(0.4,), algos=DEFAULT_ALGOS,
+              brute_force_edge_limit=0, time_limit=None, lower_bound=True, seed_base=10_000, paths=()):
+    '''
+    Genera los trabajos de un barrido. Las semillas siguen la convención de run_batch: seed_base + n*100 + i.
+    Cada archivo de paths (escrito con instance_io.write_instance) agrega una instancia más.
+    '''
+    algos = list(algos)
+    if brute_force_edge_limit and "Bruteforce" not in algos:
+        algos.append("Bruteforce")
+    if lower_bound:
+        algos.append(LOWER_BOUND)
+    jobs = []
+    for ep in edge_probs:
+        for vp in violation_probs:
+            for n in sizes:
+                for s_idx in range(seeds_per_size):
+                    seed = seed_base + n * 100 + s_idx
+                    for algo in algos:
+                        jobs.append({"n": n, "seed": seed, "edge_prob": ep, "violation_prob": vp, "algo": algo,
+                                     "time_limit": time_limit, "brute_force_edge_limit": brute_force_edge_limit})
+    for path in paths:
+        for algo in algos:
+            jobs.append({"path": path, "n": None, "seed": None, "edge_prob": None, "violation_prob": None,
+                         "algo": algo, "time_limit": time_limit, "brute_force_edge_limit": brute_force_edge_limit})
+    return jobs
+
+
+def run_jobs(jobs, workers=None, out=None):
+    '''
+    Reparte los trabajos en un ProcessPoolExecutor. Cuando terminan todas las corridas de una instancia
+    sus registros se completan y, si se indicó out, se agregan a ese archivo JSONL.
+
+    :return: lista con todos los registros
+    '''
+    pending = {}
+    for job in jobs:
+        key = instance_key(job)
+        pending[key] = pending.get(key, 0) + 1
+    partial = {key: [] for key in pending}
+    bounds = {}
+    records = []
+    f = open(out, "a") if out else None
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(run_job, job) for job in jobs]
+            for fut in as_completed(futures):
+                job, record = fut.result()
+                key = instance_key(job)
+                if job["algo"] == LOWER_BOUND:
+                    bounds[key] = record.get("lower_bound")
+                elif record is not None:
+                    partial[key].append(record)
+                pending[key] -= 1
+                if pending[key]:
+                    continue
+
+                done = finish_instance(partial.pop(key), bounds.pop(key, None))
+                path, n, seed, ep, vp = key
+                ran_bf = any(r["algo"] == "Bruteforce" for r in done)
+                for r in done:
+                    r.update({"seed": seed, "ran_bruteforce": ran_bf, "edge_prob": ep, "violation_prob": vp})
+                    if path:
+                        r["path"] = path
+                    if f:
+                        f.write(json.dumps(r) + "\n")
+                if f:
+                    f.flush()
+                records.extend(done)
+    finally:
+        if f:
+            f.close()
+    return records
+
+
+def load_records(path):
+    '''
+    Lee un archivo JSONL generado por run_jobs.
+    '''
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Barridos de experimentos DC-MST en paralelo.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[], help="valores de n")
+    parser.add_argument("--instances", nargs="+", default=[], help="archivos de instancias de instance_io")
+    parser.add_argument("--seeds", type=int, default=3, help="semillas por tamaño")
+    parser.add_argument("--edge-prob", type=float, nargs="+", default=[0.4])
+    parser.add_argument("--violation-prob", type=float, nargs="+", default=[0.4])
+    parser.add_argument("--algos", nargs="+", default=DEFAULT_ALGOS, choices=list(ALGORITHMS))
+    parser.add_argument("--brute-force-edge-limit", type=int, default=0,
+                        help="corre fuerza bruta en instancias con a lo sumo esta cantidad de aristas")
+    parser.add_argument("--no-lower-bound", action="store_true", help="no calcula la cota lagrangiana")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--time-limit", type=float, default=None, help="segundos por trabajo")
+    parser.add_argument("--seed-base", type=int, default=10_000)
+    parser.add_argument("--out", required=True, help="archivo JSONL de salida (se agregan registros)")
+    args = parser.parse_args(argv)
+
+    jobs = make_jobs(args.sizes, args.seeds, args.edge_prob, args.violation_prob, args.algos,
+                     args.brute_force_edge_limit, args.time_limit, not args.no_lower_bound, args.seed_base,
+                     args.instances)
+    start = time.perf_counter()
+    records = run_jobs(jobs, args.workers, args.out)
+    print(f"{len(jobs)} trabajos, {len(records)} registros en {time.perf_counter() - start:.1f}s -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
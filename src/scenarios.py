@@ -0,0 +1,144 @@
+'''
+Resolución de muchos escenarios de restricciones de grado sobre el mismo grafo.
+
+Lo que depende solo del grafo (representación compacta con su adyacencia, aristas ordenadas por
+peso, MST y puentes) se calcula una vez en un GraphContext y se reutiliza en cada escenario.
+Solo cambian las restricciones de grado.
+
+Uso:
+    results = solve_scenarios(G, [bounds_1, bounds_2, ...], workers=4)
+    results[i]   # registros {'algo', 'feasible', 'cost', 'time', 'tree'} del escenario i
+'''
+
+import math
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import networkx as nx
+
+from utils import get_cost, is_feasable, tree_from_edges
+from compact import CompactGraph
+from kernelization import reduction_dcmst, kruskal_dcst, kruskal_dcst_compact, kruskal_order, find_bridges
+from heuristics import dual_method
+from mst import minimum_spanning_edges
+from ch import CH_Heuristic
+from ah import AH_Heuristic
+
+DEFAULT_ALGOS = ["Kernel+Kruskal", "Dual method", "CH", "AH"]
+
+
+class GraphContext:
+    '''
+    Trabajo sobre G que no depende de las restricciones de grado.
+
+    - cg: CompactGraph de G, con las vistas en listas, el orden por peso y el índice de aristas ya armados
+    - mst_edges: aristas del árbol abarcador mínimo de G en el orden de nx.minimum_spanning_edges
+    - kruskal_order: ids de las aristas en el orden de kruskal_order
+    - bridges: puentes de G
+    '''
+    __slots__ = ('G', 'cg', 'mst_edges', 'kruskal_order', 'bridges')
+
+    def __init__(self, G: nx.Graph):
+        self.G = G
+        cg = self.cg = CompactGraph.from_nx(G)
+        # se arman de antemano las vistas perezosas de cg para que los escenarios (y los procesos que
+        # reciben el contexto) las compartan en lugar de recalcularlas cada uno
+        cg.lists()
+        cg.by_weight()
+        cg.edge_index()
+        self.mst_edges = minimum_spanning_edges(G, cg)
+        self.kruskal_order = kruskal_order(cg).tolist()
+        self.bridges = find_bridges(cg, [True] * cg.m)
+
+
+# region Algoritmos
+# Cada algoritmo recibe (contexto, degree_bounds) y devuelve el árbol
+def _kernel(ctx, degree_bounds):
+    G, cg = ctx.G, ctx.cg
+    G_red, T_star = reduction_dcmst(G, degree_bounds, cg=cg, bridges=ctx.bridges)
+    if len(G) <= 2:
+        return kruskal_dcst(G_red, T_star, degree_bounds)
+    # mismo Kruskal que kruskal_dcst, sobre cg limitado a las aristas de G_red y con el orden ya calculado
+    alive = bytearray(cg.m)
+    for e in cg.tree_edges(G_red):
+        alive[e] = 1
+    index, nodes = cg.index, cg.nodes
+    fixed = [(index[u], index[v]) for u, v in T_star.edges]
+    missing = len(T_star) - 1 - len(fixed)
+    order = [e for e in ctx.kruskal_order if alive[e]]
+    added = kruskal_dcst_compact(cg, cg.bounds(degree_bounds), fixed, missing, order)
+    _, _, _, eu, ev, ew = cg.lists()
+    T_star.add_weighted_edges_from((nodes[eu[e]], nodes[ev[e]], ew[e]) for e in added)
+    return T_star
+
+def _dual(ctx, degree_bounds):
+    return dual_method(ctx.G, tree_from_edges(ctx.G, ctx.mst_edges), degree_bounds, cg=ctx.cg)
+
+def _ch(ctx, degree_bounds):
+    return CH_Heuristic(ctx.G, degree_bounds, cg=ctx.cg, mst_edges=ctx.mst_edges)[1]
+
+def _ah(ctx, degree_bounds):
+    return AH_Heuristic(ctx.G, degree_bounds, cg=ctx.cg, mst_edges=ctx.mst_edges)[1]
+
+ALGORITHMS = {
+    "Kernel+Kruskal": _kernel,
+    "Dual method": _dual,
+    "CH": _ch,
+    "AH": _ah,
+}
+
+
+def solve_scenario(ctx: GraphContext, degree_bounds: dict, algos=DEFAULT_ALGOS):
+    '''
+    Corre los algoritmos de algos sobre ctx.G con las restricciones degree_bounds.
+
+    :return: lista de registros {'algo', 'feasible', 'cost', 'time', 'tree'}
+    '''
+    records = []
+    for algo in algos:
+        start = time.perf_counter()
+        T = ALGORITHMS[algo](ctx, degree_bounds)
+        elapsed = time.perf_counter() - start
+        feasible = len(T) == len(ctx.G) and nx.is_tree(T) and is_feasable(degree_bounds, T)
+        records.append({
+            "algo": algo,
+            "feasible": feasible,
+            "cost": float(get_cost(T) if feasible else math.inf),
+            "time": elapsed,
+            "tree": T,
+        })
+    return records
+
+
+# contexto compartido, inicializado una vez en cada proceso del pool
+_ctx = None
+
+
+def _init_worker(ctx):
+    global _ctx
+    _ctx = ctx
+
+
+def _solve_in_worker(args):
+    degree_bounds, algos = args
+    return solve_scenario(_ctx, degree_bounds, algos)
+
+
+def solve_scenarios(G: nx.Graph, scenarios, algos=DEFAULT_ALGOS, workers: int = None, ctx: GraphContext = None):
+    '''
+    Resuelve G con cada vector de restricciones de grado de scenarios.
+
+    :param scenarios: lista de diccionarios vértice -> restricción de grado
+    :param workers: cantidad de procesos. Si es None o 1 los escenarios se resuelven en este proceso.
+    :param ctx: GraphContext de G ya construido (opcional)
+    :return: lista con los registros de cada escenario, en el mismo orden (ver solve_scenario)
+    '''
+    if ctx is None:
+        ctx = GraphContext(G)
+    algos = list(algos)
+    if not workers or workers == 1:
+        return [solve_scenario(ctx, degree_bounds, algos) for degree_bounds in scenarios]
+    # el contexto viaja una sola vez a cada proceso
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(ctx,)) as pool:
+        chunk = max(1, len(scenarios) // (4 * workers))
+        return list(pool.map(_solve_in_worker, [(degree_bounds, algos) for degree_bounds in scenarios], chunksize=chunk))
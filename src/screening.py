@@ -0,0 +1,162 @@
+'''
+Detección rápida de instancias infactibles antes de correr los algoritmos.
+
+screen_instance revisa condiciones necesarias para que exista un árbol abarcador que respete las
+restricciones de grado, todas en tiempo lineal sobre la representación compacta. Si alguna falla la
+instancia es infactible con certeza; si todas se cumplen no se sabe (puede ser infactible igual).
+
+Como en el Teorema 2 de reduction_dcmst, con n > 2 una arista entre dos vértices de restricción 1 no
+puede estar en ningún árbol (sus extremos serían hojas unidas entre sí), así que se descartan antes:
+
+1. Restricciones: con n >= 2 todo vértice necesita grado al menos 1.
+2. Conectividad: el grafo sin las aristas del Teorema 2 tiene que ser conexo. Incluye el caso de un
+   vértice de restricción 1 cuyos vecinos también tienen restricción 1.
+3. Presupuesto de grados: un árbol tiene grado total 2(n-1) y cada vértice aporta a lo sumo
+   min(restricción, grado en el grafo).
+4. Hojas: los vértices de restricción 1 son hojas, y al quitar las hojas de un árbol queda un árbol, así
+   que los demás vértices tienen que inducir un subgrafo conexo.
+5. Vértices de corte: si quitar v deja c componentes, v tiene grado al menos c en cualquier árbol
+   abarcador. Las aristas que los Teoremas 1 y 3 fijan son puentes, así que esta condición también
+   detecta cuando las aristas forzadas del kernel exceden una restricción.
+
+Uso:
+    status, reason = screen_instance(G, degree_bounds)
+    if status == INFEASIBLE: ...   # reason explica qué condición falló
+'''
+
+import networkx as nx
+
+from compact import CompactGraph
+from profiling import count, timed
+
+INFEASIBLE = "infeasible"
+UNKNOWN = "unknown"
+
+
+def _components(cg, alive, keep=None):
+    '''
+    Cantidad de componentes conexas usando las aristas vivas y, si se indica, solo los vértices con keep[x].
+    '''
+    indptr, adj, adj_edge, _, _, _ = cg.lists()
+    seen = bytearray(cg.n)
+    comps = 0
+    for r in range(cg.n):
+        if seen[r] or (keep is not None and not keep[r]): continue
+        comps += 1
+        seen[r] = 1
+        stack = [r]
+        while stack:
+            x = stack.pop()
+            for k in range(indptr[x], indptr[x + 1]):
+                y = adj[k]
+                if alive[adj_edge[k]] and not seen[y] and (keep is None or keep[y]):
+                    seen[y] = 1
+                    stack.append(y)
+    return comps
+
+
+def cut_components(cg: CompactGraph, alive):
+    '''
+    Algoritmo de Tarjan (iterativo, como find_bridges) sobre las aristas vivas de cg.
+    Devuelve una lista con parts[v] = cantidad de componentes en que queda partida la componente de v
+    al quitar v (1 si v no es de corte, 0 si v está aislado).
+    '''
+    indptr, adj, adj_edge, _, _, _ = cg.lists()
+    n = cg.n
+    tin = [-1] * n
+    low = [0] * n
+    parts = [0] * n
+    root = bytearray(n)
+    timer = 0
+    for r in range(n):
+        if tin[r] != -1: continue
+        root[r] = 1
+        tin[r] = low[r] = timer
+        timer += 1
+        # pila de (vértice, arista por la que se llegó, siguiente posición de la adyacencia)
+        stack = [(r, -1, indptr[r])]
+        while stack:
+            x, pe, k = stack[-1]
+            if k < indptr[x + 1]:
+                stack[-1] = (x, pe, k + 1)
+                e = adj_edge[k]
+                if not alive[e] or e == pe: continue
+                y = adj[k]
+                if tin[y] == -1:
+                    tin[y] = low[y] = timer
+                    timer += 1
+                    stack.append((y, e, indptr[y]))
+                elif tin[y] < low[x]:
+                    low[x] = tin[y]
+                continue
+            stack.pop()
+            if stack:
+                p = stack[-1][0]
+                if low[x] < low[p]: low[p] = low[x]
+                # el subárbol de x queda separado al quitar p
+                if low[x] >= tin[p]: parts[p] += 1
+    # además de los subárboles que se separan queda el resto, que contiene al padre (salvo en las raíces)
+    for x in range(n):
+        if not root[x]: parts[x] += 1
+    return parts
+
+
+@timed('screening')
+def screen_instance(G: nx.Graph, degree_bounds: dict, cg: CompactGraph = None):
+    '''
+    Condiciones necesarias de factibilidad en tiempo lineal.
+
+    :param G: Grafo con nodos V y aristas E con pesos
+    :param degree_bounds: Diccionario que mapea cada vértice v a su límite máximo de grado
+    :param cg: Representación compacta de G (opcional)
+    :return: (INFEASIBLE, motivo) si la instancia es infactible con certeza, (UNKNOWN, None) si no
+    '''
+    n = len(G)
+    if n <= 1:
+        return UNKNOWN, None
+    if cg is None:
+        cg = CompactGraph.from_nx(G)
+    indptr, _, _, eu, ev, _ = cg.lists()
+    nodes = cg.nodes
+    bound = cg.bounds(degree_bounds)
+
+    def infeasible(reason):
+        count('screening.infeasible')
+        return INFEASIBLE, reason
+
+    low = [nodes[x] for x in range(n) if bound[x] < 1]
+    if low:
+        return infeasible(f"restricción de grado menor que 1 en {low[0]!r}")
+
+    # Teorema 2: con n > 2 las aristas entre dos vértices de restricción 1 no pueden estar en el árbol
+    alive = [n == 2 or bound[eu[e]] > 1 or bound[ev[e]] > 1 for e in range(cg.m)]
+    deg = [0] * n
+    for e in range(cg.m):
+        if alive[e]:
+            deg[eu[e]] += 1
+            deg[ev[e]] += 1
+
+    for x in range(n):
+        if deg[x] == 0:
+            if indptr[x + 1] > indptr[x]:
+                return infeasible(f"{nodes[x]!r} tiene restricción 1 y todos sus vecinos también")
+            return infeasible(f"{nodes[x]!r} no tiene aristas")
+    if _components(cg, alive) > 1:
+        return infeasible("el grafo no es conexo")
+
+    budget = sum(min(bound[x], deg[x]) for x in range(n))
+    if budget < 2 * (n - 1):
+        return infeasible(f"presupuesto de grados {budget} menor que 2(n-1) = {2 * (n - 1)}")
+
+    inner = [bound[x] > 1 for x in range(n)]
+    if n > 2:
+        if not any(inner):
+            return infeasible("todos los vértices tienen restricción 1")
+        if _components(cg, alive, inner) > 1:
+            return infeasible("los vértices de restricción mayor que 1 no inducen un subgrafo conexo")
+
+    parts = cut_components(cg, alive)
+    for x in range(n):
+        if parts[x] > bound[x]:
+            return infeasible(f"quitar {nodes[x]!r} deja {parts[x]} componentes y su restricción es {bound[x]}")
+    return UNKNOWN, None
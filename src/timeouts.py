@@ -0,0 +1,55 @@
+'''
+Límite de tiempo para las corridas de los algoritmos.
+
+time_limit(seconds) interrumpe el bloque con TimeLimitExceeded cuando pasan seconds segundos. Usa
+SIGALRM, así que solo actúa en el hilo principal y en sistemas con signal.setitimer; si no (o si seconds
+es None o 0) el bloque corre sin límite. Al salir apaga la alarma y restaura el manejador anterior; si ya
+había otra alarma pendiente (un time_limit dentro de otro) la vuelve a programar con el tiempo que le quedaba.
+
+Uso:
+    try:
+        with time_limit(60):
+            cost, T = AH_Heuristic(G, degree_bounds)
+    except TimeLimitExceeded:
+        ...
+'''
+
+import signal
+import threading
+import time
+from contextlib import contextmanager
+
+
+class TimeLimitExceeded(Exception):
+    pass
+
+
+def _on_alarm(signum, frame):
+    raise TimeLimitExceeded()
+
+
+def available():
+    '''
+    True si time_limit puede interrumpir en este hilo.
+    '''
+    return hasattr(signal, "setitimer") and threading.current_thread() is threading.main_thread()
+
+
+@contextmanager
+def time_limit(seconds):
+    '''
+    :param seconds: tiempo máximo del bloque (None o 0: sin límite)
+    '''
+    if not seconds or not available():
+        yield
+        return
+    previous = signal.signal(signal.SIGALRM, _on_alarm)
+    outer, _ = signal.setitimer(signal.ITIMER_REAL, seconds)
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+        if outer:
+            signal.setitimer(signal.ITIMER_REAL, max(outer - (time.monotonic() - start), 1e-6))
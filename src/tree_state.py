@@ -0,0 +1,77 @@
+'''
+Estado de un árbol (o bosque) sobre un CompactGraph para las heurísticas de intercambio.
+
+Las heurísticas necesitan en cada iteración el grado de cada vértice, el costo del árbol y
+qué vértices violan su restricción. TreeState los mantiene al día al agregar o quitar aristas,
+así que consultarlos no requiere recorrer el árbol.
+'''
+
+
+class TreeState:
+    '''
+    - deg: grado de cada vértice en el árbol
+    - bound: restricción de grado de cada vértice
+    - cost: suma de los pesos de las aristas del árbol
+    - in_tree: in_tree[e] = 1 si la arista e está en el árbol
+    - violators: vértices con deg > bound
+    - size: cantidad de aristas del árbol
+    '''
+    __slots__ = ('cg', 'deg', 'bound', 'cost', 'in_tree', 'violators', 'size')
+
+    def __init__(self, cg, bound, tree_edges=()):
+        '''
+        :param cg: CompactGraph del grafo
+        :param bound: restricciones de grado indexadas por vértice (ver CompactGraph.bounds)
+        :param tree_edges: ids de las aristas iniciales del árbol
+        '''
+        self.cg = cg
+        self.bound = bound
+        self.deg = [0] * cg.n
+        self.cost = 0
+        self.in_tree = bytearray(cg.m)
+        self.violators = set()
+        self.size = 0
+        for e in tree_edges:
+            self.add(e)
+
+    def add(self, e):
+        _, _, _, eu, ev, ew = self.cg.lists()
+        deg, bound = self.deg, self.bound
+        self.in_tree[e] = 1
+        self.cost += ew[e]
+        self.size += 1
+        for x in (eu[e], ev[e]):
+            deg[x] += 1
+            if deg[x] > bound[x]: self.violators.add(x)
+
+    def remove(self, e):
+        _, _, _, eu, ev, ew = self.cg.lists()
+        deg, bound = self.deg, self.bound
+        self.in_tree[e] = 0
+        self.cost -= ew[e]
+        self.size -= 1
+        for x in (eu[e], ev[e]):
+            deg[x] -= 1
+            if deg[x] <= bound[x]: self.violators.discard(x)
+
+    def swap(self, remove, add):
+        '''
+        Quita la arista remove y agrega la arista add (ids de cg).
+        '''
+        self.remove(remove)
+        self.add(add)
+
+    def excess(self, x):
+        return self.deg[x] - self.bound[x]
+
+    def feasible(self):
+        '''
+        True si ningún vértice viola su restricción de grado.
+        '''
+        return not self.violators
+
+    def edges(self):
+        '''
+        Ids de las aristas del árbol.
+        '''
+        return [e for e in range(self.cg.m) if self.in_tree[e]]
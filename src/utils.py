@@ -1,22 +1,29 @@
 '''
 Funciones de utilidad
 - set_of(x,parent): devuelve el representante de la clase de equivalencia de x.
-- merge(x,y,parent): une las clases de equivalencia de x e y si no son la misma.
+- merge(x,y,parent,rank=None): une las clases de equivalencia de x e y si no son la misma (por rango si se pasa rank).
 
 - get_cost(G): calcula el costo de las aristas del grafo que recibe como parámetro.
 - is_feasable(T,degree_bounds): devuelve True si todos los vértices del árbol respetan su restricción de grado.
+- tree_from_edges(G,edges): arma el grafo con los vértices de G y las aristas dadas, en ese orden.
 '''
 
 import networkx as nx
 
 def set_of(x,parent):
-    if parent[x] == x: return x
-    parent[x] = set_of(parent[x],parent)
-    return parent[x]
+    # iterativo con compresión por mitades: no depende del límite de recursión en cadenas largas
+    while parent[x] != x:
+        parent[x] = parent[parent[x]]
+        x = parent[x]
+    return x
 
-def merge(x,y,parent):
+def merge(x,y,parent,rank=None):
     px,py = set_of(x,parent),set_of(y,parent)
     if px == py: return False
+    if rank is not None:
+        # unión por rango: el árbol más bajo cuelga del más alto
+        if rank[px] < rank[py]: px,py = py,px
+        if rank[px] == rank[py]: rank[px] += 1
     parent[py] = px
     return True
 
@@ -30,4 +37,15 @@ def is_feasable(degree_bound,T:nx.Graph):
     '''
     Verifica que cada nodo del árbol cumpla con la restricción de grado.
     '''
-    return all(T.degree(node) <= degree_bound[node] for node in T)
\ No newline at end of file
+    return all(T.degree(node) <= degree_bound[node] for node in T)
+
+def tree_from_edges(G:nx.Graph,edges):
+    '''
+    Arma un grafo con todos los vértices de G y las aristas (u,v,datos) en el orden dado, igual que
+    nx.minimum_spanning_tree. Con edges = list(nx.minimum_spanning_edges(G,data=True)) se obtiene el
+    mismo MST, con los vecinos en el mismo orden (G.copy() no conserva ese orden).
+    '''
+    T = nx.Graph()
+    T.add_nodes_from(G.nodes.items())
+    T.add_edges_from(edges)
+    return T